@@ -0,0 +1,9 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # cached responses are keyed on data versions, which restart every test
+    for cache in caches.all():
+        cache.clear()
@@ -0,0 +1,99 @@
+"""
+JSON encoding for API responses.
+
+The encoder is chosen by the API_JSON_ENCODER setting. With "auto", orjson is
+used when it is installed and the standard library json module otherwise.
+Both encode dates, times and decimals the same way as DjangoJSONEncoder.
+
+JSON already serialized by the database can be wrapped in RawJSON. With orjson
+(3.9 or later) the text is copied into the response as is, otherwise it is
+decoded and encoded again.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class RawJSON:
+    """JSON text to include in a response without decoding it."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+
+class APIJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, RawJSON):
+            return json.loads(o.text)
+        return super().default(o)
+
+
+api_encoder = APIJSONEncoder()
+
+
+def default_for_orjson(obj):
+    if isinstance(obj, RawJSON):
+        if hasattr(orjson, "Fragment"):
+            return orjson.Fragment(obj.text)
+        return orjson.loads(obj.text)
+    return api_encoder.default(obj)
+
+
+def encode_with_json(data):
+    return json.dumps(data, cls=APIJSONEncoder).encode()
+
+
+def encode_with_orjson(data):
+    return orjson.dumps(
+        data,
+        default=default_for_orjson,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+ENCODERS = {
+    "json": encode_with_json,
+    "orjson": encode_with_orjson,
+}
+
+
+def get_encoder():
+    name = settings.API_JSON_ENCODER
+
+    if name == "auto":
+        name = "json" if orjson is None else "orjson"
+
+    if name not in ENCODERS:
+        raise ImproperlyConfigured(
+            "Unknown API_JSON_ENCODER '%s'. Please use one of: auto, %s."
+            % (name, ", ".join(ENCODERS))
+        )
+
+    if name == "orjson" and orjson is None:
+        raise ImproperlyConfigured("API_JSON_ENCODER is orjson, but it is not installed.")
+
+    return ENCODERS[name]
+
+
+def encode(data):
+    """Return data encoded as JSON bytes."""
+    return get_encoder()(data)
+
+
+class JSONResponse(HttpResponse):
+    """Like JsonResponse, but encoded with the configured encoder."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=encode(data), **kwargs)
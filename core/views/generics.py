@@ -1,21 +1,307 @@
-from django.core.exceptions import BadRequest
-from django.http import HttpResponse, JsonResponse
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+import operator
+from functools import reduce, wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import (
+    BadRequest,
+    EmptyResultSet,
+    FieldDoesNotExist,
+    ValidationError,
+)
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, models
+from django.db.models import Count, Q, Window
+from django.db.models.functions import Cast, RowNumber
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views import View
+from django.views.decorators.http import condition
+
+from core.views.encoding import JSONResponse, RawJSON, get_encoder
+from synchronization.models import DATASET_GENERATION, DataVersion
 
 
 class ClientError(BadRequest):
     pass
 
 
+class CursorJSONEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        # keep full precision, DjangoJSONEncoder truncates to milliseconds
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values):
+    data = json.dumps(values, cls=CursorJSONEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode("utf8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, length):
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, binascii.Error) as exc:
+        raise ClientError("The provided cursor is not valid.") from exc
+
+    if not isinstance(values, list) or len(values) != length:
+        raise ClientError("The provided cursor is not valid.")
+
+    return values
+
+
+def after_cursor(ordering, values):
+    """Build a filter matching rows positioned after values in ordering."""
+    conditions = []
+
+    for position, field in enumerate(ordering):
+        preceding = {
+            name.lstrip("-"): value
+            for name, value in zip(ordering[:position], values[:position])
+        }
+        lookup = "%s__%s" % (field.lstrip("-"), "lt" if field.startswith("-") else "gt")
+        conditions.append(Q(**preceding, **{lookup: values[position]}))
+
+    return reduce(operator.or_, conditions)
+
+
+def counting_queryset(queryset):
+    """
+    Return queryset without what does not change the number of objects in
+    it, i.e. ordering and (for DISTINCT) columns other than the primary key.
+    """
+    queryset = queryset.order_by()
+
+    query = queryset.query
+
+    if (
+        query.distinct
+        and not query.distinct_fields
+        and not query.values_select
+        and not query.annotation_select
+        and not query.combinator
+    ):
+        # rows of a model are distinct if their primary keys are
+        queryset = queryset.values("pk")
+
+    return queryset
+
+
+def get_ordering(queryset):
+    """Return the ordering of queryset, falling back on the model ordering."""
+    query = queryset.query
+
+    if query.order_by:
+        return list(query.order_by)
+    if query.default_ordering:
+        return list(query.get_meta().ordering)
+
+    return []
+
+
+def paginate(queryset, offset=0, limit=0):
+    offset = abs(int(offset))
+    limit = abs(int(limit))
+
+    if limit > 0:
+        return queryset[offset : (offset + limit)]
+    elif offset > 0:
+        return queryset[offset:]
+
+    return queryset
+
+
+def stream_collection(plural_key, objects, chunk_size, columns=None):
+    """
+    Encode objects as {plural_key: [...]}, yielding chunks of rows. If columns
+    is given, objects are expected to be rows of values in that order and are
+    encoded as {"columns": [...], plural_key: [...]}.
+    """
+    encode = get_encoder()
+
+    if columns is None:
+        yield b"{%s:[" % encode(plural_key)
+    else:
+        yield b"{%s:%s,%s:[" % (encode("columns"), encode(columns), encode(plural_key))
+
+    chunk = []
+    for index, obj in enumerate(objects):
+        chunk.append((b"," if index else b"") + encode(obj))
+        if len(chunk) >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+
+    yield b"".join(chunk) + b"]}"
+
+
+def to_rows(objects, columns):
+    """Return the values of each object dict as a list, in column order."""
+    return ([obj[column] for column in columns] for obj in objects)
+
+
+def normalized_path(request):
+    """Return the request path with query parameters in a stable order."""
+    query = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    return "%s?%s" % (request.path, urlencode(query, doseq=True))
+
+
+def cached_response(view_func, cache, key):
+    """Call view_func unless a response for key is found in cache."""
+
+    @wraps(view_func)
+    def inner(request, *args, **kwargs):
+        if request.method != "GET":
+            return view_func(request, *args, **kwargs)
+
+        response = cache.get(key)
+
+        if response is None:
+            response = view_func(request, *args, **kwargs)
+
+            if (
+                response.status_code == 200
+                and not response.streaming
+                and len(response.content) <= settings.API_CACHE_MAX_ENTRY_SIZE
+            ):
+                cache.set(key, response, timeout=None)
+
+        return response
+
+    return inner
+
+
+def data_version_condition(*names, cache=None):
+    """
+    Decorate a view to answer conditional requests (If-None-Match and
+    If-Modified-Since) from the data versions of the given tables.
+
+    If a cache alias is given, responses are also stored in that cache,
+    keyed on the normalized request path, the data versions and the
+    dataset generation that is bumped when syncdb completes.
+    """
+    if cache is not None:
+        names = (*names, DATASET_GENERATION)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            versions, last_modified = DataVersion.objects.get_state(*names)
+
+            # used by views to key other cached values, e.g. counts
+            request.data_versions = versions
+
+            etag = None
+            if versions:
+                etag = hashlib.md5(
+                    repr((normalized_path(request), versions)).encode("utf8"),
+                    usedforsecurity=False,
+                ).hexdigest()
+
+            response_func = view_func
+
+            if cache is not None and etag is not None:
+                response_func = cached_response(
+                    view_func, caches[cache], "response:%s" % etag
+                )
+
+            conditional_view = condition(
+                etag_func=lambda *args, **kwargs: etag,
+                last_modified_func=lambda *args, **kwargs: last_modified,
+            )(response_func)
+
+            return conditional_view(request, *args, **kwargs)
+
+        return inner
+
+    return decorator
+
+
+class DataVersionMixin:
+    # Names of the tables that the response is built from, e.g. ("taxon",)
+    data_versions = ()
+
+    # Alias of the cache to store responses in, e.g. "api"
+    response_cache = None
+
+    def dispatch(self, request, *args, **kwargs):
+        handler = super().dispatch
+
+        if self.data_versions:
+            handler = data_version_condition(
+                *self.data_versions, cache=self.response_cache
+            )(handler)
+
+        return handler(request, *args, **kwargs)
+
+
+class RawJSONField(models.TextField):
+    """Output field for JSON fetched as text, which is wrapped in RawJSON."""
+
+    def from_db_value(self, value, expression, connection):
+        return None if value is None else RawJSON(value)
+
+
+# Prefix for the aliases that JSON fields are fetched as text under
+RAW_JSON_PREFIX = "_raw_json_"
+
+
+def is_json_field(model, name):
+    try:
+        return isinstance(model._meta.get_field(name), models.JSONField)
+    except FieldDoesNotExist:
+        return False
+
+
+def restore_raw_json(obj):
+    """Return a row from get_values with the original field names."""
+    return {key.removeprefix(RAW_JSON_PREFIX): value for key, value in obj.items()}
+
+
 class SelectableFieldsMixin:
     fields = None
 
+    # Fetch JSON fields as text and pass it through to the response as is,
+    # instead of decoding it in Python only to encode it again
+    raw_json = True
+
     def get_fields(self, selected_fields=[]):
         user_selected_fields = list(
             filter(lambda field: field in self.fields, map(str.strip, selected_fields))
         )
         return (user_selected_fields or self.fields, {})
 
+    def get_values(self, queryset, *fields, **expressions):
+        """
+        Return queryset.values(*fields, **expressions), with JSON fields fetched
+        as text under an alias. Rows are passed through restore_raw_json.
+        """
+        if self.raw_json:
+            raw_json_names = {
+                name
+                for name in fields
+                if name not in expressions and is_json_field(queryset.model, name)
+            }
+            fields = [
+                RAW_JSON_PREFIX + name if name in raw_json_names else name
+                for name in fields
+            ]
+            expressions = {
+                **expressions,
+                **{
+                    RAW_JSON_PREFIX + name: Cast(name, RawJSONField())
+                    for name in raw_json_names
+                },
+            }
+
+        return queryset.values(*fields, **expressions)
+
 
 class SingleObjectMixin(SelectableFieldsMixin):
     queryset = None
@@ -25,32 +311,194 @@ class SingleObjectMixin(SelectableFieldsMixin):
 
     def get_object_dict(self, queryset, *args, **kwargs):
         fields, expressions = self.get_fields(kwargs.get("fields", []))
-        queryset = queryset.values(*fields, **expressions)
-        return dict(queryset.get(slug=kwargs.get("slug")))
+        queryset = self.get_values(queryset, *fields, **expressions)
+        return restore_raw_json(queryset.get(slug=kwargs.get("slug")))
 
 
 class MultipleObjectMixin(SelectableFieldsMixin):
     queryset = None
 
+    # Unique, non-nullable ordering used for cursor (keyset) pagination,
+    # e.g. ("scientific_name", "id"). Cursor pagination is disabled if unset.
+    cursor_fields = None
+
+    total_alias = "collection_total"
+
+    position_alias = "collection_position"
+
+    # Number of rows fetched per round trip when streaming
+    chunk_size = 2000
+
     def get_queryset(self):
         return self.queryset.all()
 
+    def get_count(self, queryset):
+        """Return the number of objects in queryset."""
+        return counting_queryset(queryset).count()
+
     def get_object_list(self, queryset, *args, **kwargs):
         fields, expressions = self.get_fields(kwargs.get("fields", []))
-        queryset = queryset.values(*fields, **expressions)
+        queryset = self.get_values(queryset, *fields, **expressions)
+
+        queryset = paginate(queryset, kwargs.get("offset", 0), kwargs.get("limit", 0))
+
+        return list(map(restore_raw_json, queryset))
+
+    def get_object_iterator(self, queryset, *args, **kwargs):
+        fields, expressions = self.get_fields(kwargs.get("fields", []))
+        queryset = self.get_values(queryset, *fields, **expressions)
+
+        queryset = paginate(queryset, kwargs.get("offset", 0), kwargs.get("limit", 0))
+
+        return map(restore_raw_json, queryset.iterator(chunk_size=self.chunk_size))
+
+    def get_object_list_and_total(self, queryset, *args, **kwargs):
+        """
+        Return the object list together with the total number of objects,
+        counted with a window function in the same query as the list.
+        """
+        if queryset.query.distinct or queryset.query.combinator:
+            # window functions are evaluated before DISTINCT and set operations
+            object_list = self.get_object_list(queryset, *args, **kwargs)
+            return object_list, self.get_count(queryset)
+
+        fields, expressions = self.get_fields(kwargs.get("fields", []))
+        paginated_queryset = self.get_values(
+            queryset, *fields, **expressions, **{self.total_alias: Window(Count("*"))}
+        )
 
         offset = abs(int(kwargs.get("offset", 0)))
-        limit = abs(int(kwargs.get("limit", 0)))
 
-        if limit > 0:
-            queryset = queryset[offset : (offset + limit)]
+        paginated_queryset = paginate(paginated_queryset, offset, kwargs.get("limit", 0))
+
+        object_list = list(paginated_queryset)
+
+        if object_list:
+            total = object_list[0][self.total_alias]
         elif offset > 0:
-            queryset = queryset[offset:]
+            # paginated past the end, the window has nothing to count
+            total = self.get_count(queryset)
+        else:
+            total = 0
+
+        for obj in object_list:
+            del obj[self.total_alias]
+
+        return list(map(restore_raw_json, object_list)), total
+
+    def get_document(self, queryset, *args, **kwargs):
+        """
+        Return the collection document {plural_key: [...]} as JSON text built
+        by the database in one query, together with the total number of
+        objects if with_total is set.
+        """
+        fields, expressions = self.get_fields(kwargs.get("fields", []))
+
+        with_total = kwargs.get("with_total", False)
+
+        if with_total:
+            expressions = {**expressions, self.total_alias: Window(Count("*"))}
+
+        # json_agg does not keep the order of the rows it is given, so they
+        # are numbered in the order of the queryset and aggregated by number
+        expressions = {
+            **expressions,
+            self.position_alias: Window(RowNumber(), order_by=get_ordering(queryset)),
+        }
+
+        hidden_names = (self.total_alias, self.position_alias)
+
+        names = [
+            name
+            for name in dict.fromkeys([*fields, *expressions])
+            if name not in hidden_names
+        ]
 
-        return list(queryset)
+        offset = abs(int(kwargs.get("offset", 0)))
+
+        paginated_queryset = paginate(
+            queryset.values(*fields, **expressions), offset, kwargs.get("limit", 0)
+        )
+
+        connection = connections[queryset.db]
+        quote_name = connection.ops.quote_name
+
+        subquery_sql, params = paginated_queryset.query.sql_with_params()
+
+        sql = (
+            "SELECT json_build_object(%%s, COALESCE(json_agg(json_build_object(%s) "
+            "ORDER BY collection.%s), '[]'::json))::text, MAX(%s) FROM (%s) collection"
+            % (
+                ", ".join("%%s, collection.%s" % quote_name(name) for name in names),
+                quote_name(self.position_alias),
+                "collection.%s" % quote_name(self.total_alias) if with_total else "NULL",
+                subquery_sql,
+            )
+        )
+        params = (self.plural_key, *names, *params)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            document, total = cursor.fetchone()
+
+        if with_total and total is None:
+            # paginated past the end, the window has nothing to count
+            total = self.get_count(queryset) if offset > 0 else 0
+
+        return document, total
+
+    def get_total_estimate(self, queryset):
+        """Return the number of objects estimated by the query planner."""
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    def get_object_page(self, queryset, *args, **kwargs):
+        if not self.cursor_fields:
+            raise ClientError("Cursor pagination is not supported for this collection.")
+
+        fields, expressions = self.get_fields(kwargs.get("fields", []))
+
+        key_names = [field.lstrip("-") for field in self.cursor_fields]
+        hidden_key_names = [
+            name for name in key_names if name not in fields and name not in expressions
+        ]
+
+        queryset = queryset.order_by(*self.cursor_fields)
+
+        cursor = kwargs.get("cursor")
+
+        limit = abs(int(kwargs.get("limit", 0)))
+
+        try:
+            if cursor:
+                values = decode_cursor(cursor, len(self.cursor_fields))
+                queryset = queryset.filter(after_cursor(self.cursor_fields, values))
+
+            queryset = self.get_values(
+                queryset, *fields, *hidden_key_names, **expressions
+            )
+
+            if limit > 0:
+                queryset = queryset[:limit]
+
+            object_list = list(queryset)
+        except (TypeError, ValueError, ValidationError) as exc:
+            # well-formed cursor, but with values of the wrong types
+            raise ClientError("The provided cursor is not valid.") from exc
 
+        next_cursor = None
 
-class ResourceView(SingleObjectMixin, View):
+        if limit > 0 and len(object_list) == limit:
+            next_cursor = encode_cursor([object_list[-1][name] for name in key_names])
+
+        for obj in object_list:
+            for name in hidden_key_names:
+                del obj[name]
+
+        return list(map(restore_raw_json, object_list)), next_cursor
+
+
+class ResourceView(DataVersionMixin, SingleObjectMixin, View):
     def get(self, request, *args, **kwargs):
         try:
             queryset = self.get_queryset()
@@ -61,7 +509,7 @@ class ResourceView(SingleObjectMixin, View):
                 fields=request.GET.get("fields", "").split(","),
             )
         except queryset.model.DoesNotExist:
-            return JsonResponse(
+            return JSONResponse(
                 {
                     "message": "%(resource)s does not exist."
                     % {"resource": queryset.model._meta.verbose_name.title()}
@@ -69,39 +517,269 @@ class ResourceView(SingleObjectMixin, View):
                 status=404,
             )
         except ClientError as exc:
-            return JsonResponse({"message": str(exc)}, status=400)
+            return JSONResponse({"message": str(exc)}, status=400)
 
-        return JsonResponse(response_object)
+        return JSONResponse(response_object)
 
 
-class CollectionView(MultipleObjectMixin, View):
+class ResourceBatchView(DataVersionMixin, SingleObjectMixin, View):
     plural_key = "results"
 
-    def head(self, request, *args, **kwargs):
-        response_headers = {
-            "X-Total": self.get_queryset().count(),
+    # Query parameters accepted for looking up objects, by model field name.
+    # Each takes a comma-separated list, e.g. ?slug=a,b,c
+    lookup_fields = ("slug",)
+
+    max_batch_size = 500
+
+    def get_lookup(self):
+        lookups = {
+            field: self.request.GET[field]
+            for field in self.lookup_fields
+            if self.request.GET.get(field)
         }
-        return HttpResponse(headers=response_headers)
+
+        if len(lookups) != 1:
+            raise ClientError(
+                "Please provide exactly one of: %s." % ", ".join(self.lookup_fields)
+            )
+
+        ((field, values),) = lookups.items()
+        values = list(dict.fromkeys(value.strip() for value in values.split(",")))
+
+        if len(values) > self.max_batch_size:
+            raise ClientError(
+                "It is not possible to look up more than %u objects at once."
+                % self.max_batch_size
+            )
+
+        return field, values
+
+    def get_object_dicts(self, queryset, field, values, *args, **kwargs):
+        """
+        Return a dict of objects keyed by the requested values, in one query.
+        Values that don't match any object are mapped to None.
+        """
+        fields, expressions = self.get_fields(kwargs.get("fields", []))
+
+        # the lookup field is needed for keying, even if not selected
+        hidden_fields = [
+            name for name in [field] if name not in fields and name not in expressions
+        ]
+
+        queryset = self.get_values(queryset, *fields, *hidden_fields, **expressions)
+
+        try:
+            object_list = list(
+                map(restore_raw_json, queryset.filter(**{"%s__in" % field: values}))
+            )
+        except (ValueError, ValidationError) as exc:
+            raise ClientError("The provided value for %s is not valid." % field) from exc
+
+        object_dicts = dict.fromkeys(values)
+
+        for obj in object_list:
+            key = str(obj.pop(field) if hidden_fields else obj[field])
+            object_dicts[key] = obj
+
+        return object_dicts
 
     def get(self, request, *args, **kwargs):
         try:
-            queryset = self.get_queryset()
+            field, values = self.get_lookup()
 
-            object_list = self.get_object_list(
-                queryset,
-                offset=request.GET.get("offset", 0),
-                limit=request.GET.get("limit", 0),
+            object_dicts = self.get_object_dicts(
+                self.get_queryset(),
+                field,
+                values,
                 fields=request.GET.get("fields", "").split(","),
             )
         except ClientError as exc:
-            return JsonResponse({"message": str(exc)}, status=400)
+            return JSONResponse({"message": str(exc)}, status=400)
 
-        response_headers = {
-            "X-Total": queryset.count(),
-        }
+        return JSONResponse({self.plural_key: object_dicts})
 
-        response_objects = {
-            self.plural_key: object_list,
-        }
 
-        return JsonResponse(response_objects, headers=response_headers)
+class CollectionView(DataVersionMixin, MultipleObjectMixin, View):
+    plural_key = "results"
+
+    # Let the database build the response document for offset pagination.
+    # PostgreSQL encodes dates differently than Python, so only enable this
+    # for collections without date or time fields.
+    render_in_database = False
+
+    total_modes = ("exact", "estimate", "none")
+
+    formats = ("objects", "columns")
+
+    def get_format(self):
+        response_format = self.request.GET.get("format", "objects")
+
+        if response_format not in self.formats:
+            raise ClientError(
+                "The provided value for format is not valid. Please "
+                "try one of the following: %s." % ", ".join(self.formats)
+            )
+
+        return response_format
+
+    def get_columns(self):
+        """Return the names of the selected fields, in the order of the rows."""
+        fields, _expressions = self.get_fields(
+            self.request.GET.get("fields", "").split(",")
+        )
+        return list(dict.fromkeys(fields))
+
+    def get_count(self, queryset):
+        """
+        Return the number of objects in queryset. Counts are stored in the
+        response cache, keyed on the counting query and the data versions, so
+        requests with the same filters share them whatever else they select.
+        """
+        versions = getattr(self.request, "data_versions", None)
+
+        if self.response_cache is None or not versions:
+            return super().get_count(queryset)
+
+        try:
+            sql, params = counting_queryset(queryset).query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+
+        key = "count:%s" % (
+            hashlib.md5(
+                repr((sql, params, versions)).encode("utf8"), usedforsecurity=False
+            ).hexdigest()
+        )
+
+        cache = caches[self.response_cache]
+
+        count = cache.get(key)
+
+        if count is None:
+            count = super().get_count(queryset)
+            cache.set(key, count, timeout=None)
+
+        return count
+
+    def get_total_mode(self):
+        total_mode = self.request.GET.get("total", "exact")
+
+        if total_mode not in self.total_modes:
+            raise ClientError(
+                "The provided value for total is not valid. Please "
+                "try one of the following: %s." % ", ".join(self.total_modes)
+            )
+
+        return total_mode
+
+    def get_total_headers(self, queryset, total_mode, total=None):
+        if total_mode == "exact":
+            return {"X-Total": self.get_count(queryset) if total is None else total}
+        if total_mode == "estimate":
+            return {"X-Total-Estimate": self.get_total_estimate(queryset)}
+        return {}
+
+    def head(self, request, *args, **kwargs):
+        try:
+            response_headers = self.get_total_headers(
+                self.get_queryset(), self.get_total_mode()
+            )
+        except ClientError as exc:
+            return JSONResponse({"message": str(exc)}, status=400)
+
+        return HttpResponse(headers=response_headers)
+
+    def get(self, request, *args, **kwargs):
+        next_cursor = None
+        total = None
+
+        try:
+            total_mode = self.get_total_mode()
+
+            columns = self.get_columns() if self.get_format() == "columns" else None
+
+            queryset = self.get_queryset()
+
+            if request.GET.get("stream") == "true":
+                if "cursor" in request.GET:
+                    raise ClientError("It is not possible to combine cursor and stream.")
+
+                object_iterator = self.get_object_iterator(
+                    queryset,
+                    offset=request.GET.get("offset", 0),
+                    limit=request.GET.get("limit", 0),
+                    fields=request.GET.get("fields", "").split(","),
+                )
+
+                if columns is not None:
+                    object_iterator = to_rows(object_iterator, columns)
+
+                return StreamingHttpResponse(
+                    stream_collection(
+                        self.plural_key, object_iterator, self.chunk_size, columns
+                    ),
+                    content_type="application/json",
+                    headers=self.get_total_headers(queryset, total_mode),
+                )
+            elif "cursor" in request.GET:
+                if "offset" in request.GET:
+                    raise ClientError("It is not possible to combine cursor and offset.")
+
+                object_list, next_cursor = self.get_object_page(
+                    queryset,
+                    cursor=request.GET.get("cursor"),
+                    limit=request.GET.get("limit", 0),
+                    fields=request.GET.get("fields", "").split(","),
+                )
+            elif (
+                self.render_in_database
+                and columns is None
+                and not queryset.query.distinct
+                and not queryset.query.combinator
+            ):
+                document, total = self.get_document(
+                    queryset,
+                    offset=request.GET.get("offset", 0),
+                    limit=request.GET.get("limit", 0),
+                    fields=request.GET.get("fields", "").split(","),
+                    with_total=total_mode == "exact",
+                )
+
+                return HttpResponse(
+                    document,
+                    content_type="application/json",
+                    headers=self.get_total_headers(queryset, total_mode, total),
+                )
+            elif total_mode == "exact":
+                object_list, total = self.get_object_list_and_total(
+                    queryset,
+                    offset=request.GET.get("offset", 0),
+                    limit=request.GET.get("limit", 0),
+                    fields=request.GET.get("fields", "").split(","),
+                )
+            else:
+                object_list = self.get_object_list(
+                    queryset,
+                    offset=request.GET.get("offset", 0),
+                    limit=request.GET.get("limit", 0),
+                    fields=request.GET.get("fields", "").split(","),
+                )
+        except ClientError as exc:
+            return JSONResponse({"message": str(exc)}, status=400)
+
+        response_headers = self.get_total_headers(queryset, total_mode, total)
+
+        if next_cursor is not None:
+            response_headers["X-Next-Cursor"] = next_cursor
+
+        if columns is not None:
+            response_objects = {
+                "columns": columns,
+                self.plural_key: list(to_rows(object_list, columns)),
+            }
+        else:
+            response_objects = {
+                self.plural_key: object_list,
+            }
+
+        return JSONResponse(response_objects, headers=response_headers)
@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand
 from django.db import transaction
 
 from facts.models import Facts
+from synchronization.models import DataVersion
 
 ALGAEBASE = (
     Path(settings.CONTENT_DIR, "species", "facts_external_links_algaebase.txt"),
@@ -146,6 +147,7 @@ class Command(BaseCommand):
 
         with transaction.atomic(savepoint=False):
             Facts.objects.all().delete()
+            DataVersion.objects.bump(Facts._meta.db_table)
 
             nomp_file, nomp_opts = NOMP
             if verbosity > 0:
@@ -6,6 +6,7 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
 from facts.models import Facts
+from synchronization.models import DataVersion
 
 
 class Command(BaseCommand):
@@ -278,6 +279,8 @@ class Command(BaseCommand):
 
                     object_to_save.save()
                     number_of_saved_objects = number_of_saved_objects + 1
+
+                DataVersion.objects.bump(Facts._meta.db_table)
         except Exception as e:
             raise CommandError(
                 "Failed to write to database. Import aborted. Error was %s." % e
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:49
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("facts", "0001_initial"),
+        ("taxa", "0006_taxon_taxon_rank_idx_taxon_taxon_rank_upper_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="facts",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["data"],
+                name="taxon_facts_data_gin_idx",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+    ]
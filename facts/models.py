@@ -1,3 +1,6 @@
+from typing import ClassVar
+
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 from taxa.models import Taxon
@@ -14,6 +17,14 @@ class Facts(models.Model):
 
     class Meta:
         db_table = "taxon_facts"
+        indexes: ClassVar = [
+            # for culture collection, harmful and HELCOM EG Phyto filters
+            GinIndex(
+                fields=["data"],
+                opclasses=["jsonb_path_ops"],
+                name="taxon_facts_data_gin_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.taxon.scientific_name} facts"
@@ -1,15 +1,20 @@
-from django.http import JsonResponse
 from django.views import View
 
+from core.views.encoding import JSONResponse
+from core.views.generics import DataVersionMixin
 from taxa.models import Taxon
 
 
-class TaxonFactsCollectionView(View):
+class TaxonFactsCollectionView(DataVersionMixin, View):
+    data_versions = ("taxon", "taxon_facts")
+
+    response_cache = "api"
+
     def get(self, request, slug):
         try:
             taxon = Taxon.objects.get(slug=slug)
-            return JsonResponse({"facts": taxon.facts.data})
+            return JSONResponse({"facts": taxon.facts.data})
         except Taxon.DoesNotExist:
-            return JsonResponse({"message": "Taxon not found"}, status=404)
+            return JSONResponse({"message": "Taxon not found"}, status=404)
         except Taxon.facts.RelatedObjectDoesNotExist:
-            return JsonResponse({"message": "Facts not found"}, status=404)
+            return JSONResponse({"message": "Facts not found"}, status=404)
@@ -1,5 +1,12 @@
 def get_media_models(include_base=False):
     from .models import Media
 
-    subclasses = Media.__subclasses__()
+    def get_subclasses(model):
+        for subclass in model.__subclasses__():
+            yield subclass
+            yield from get_subclasses(subclass)
+
+    # signals are sent with the (proxy) class of the instance as sender, so
+    # subclasses of subclasses, e.g. ImageLabelingImage, are included as well
+    subclasses = list(dict.fromkeys(get_subclasses(Media)))
     return [Media, *subclasses] if include_base else subclasses
@@ -2,22 +2,30 @@ import json
 from typing import ClassVar
 
 from django import forms
+from django.conf import settings
 from django.contrib import admin, messages
 from django.core.exceptions import PermissionDenied
 from django.core.paginator import Paginator
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import OuterRef, Q, Subquery
 from django.http import JsonResponse
 from django.shortcuts import redirect, render
 from django.urls import path, reverse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 from django.views.decorators.csrf import csrf_protect
 from django.views.decorators.http import require_POST
 
 from media.forms import ImageForm, ImageLabelingImageForm
-from media.models import Image, ImageLabelingImage
+from media.models import (
+    Image,
+    ImageLabelingImage,
+    RenditionJob,
+    ZipUploadJob,
+    refresh_taxon_media,
+)
+from synchronization.models import DataVersion
 from taxa.models import Taxon
 
 
@@ -126,7 +134,7 @@ class MediaAdmin(admin.ModelAdmin):
             )
         }
 
-    list_display = ("preview", "title", "taxon", "priority_actions")
+    list_display = ("preview", "title", "taxon", "renditions_status", "priority_actions")
 
     search_fields = (
         "attributes__title",
@@ -158,6 +166,10 @@ class MediaAdmin(admin.ModelAdmin):
     def get_preview_html(self, obj):
         return format_html('<span class="not-available">?</span>')
 
+    @admin.display(description="Renditions")
+    def renditions_status(self, obj):
+        return obj.rendition_job_status
+
     @admin.display(ordering="priority", description="Priority")
     def priority_actions(self, obj):
         boolean_attrs = "disabled" if not self.enable_priority_sorting else ""
@@ -245,6 +257,10 @@ class MediaAdmin(admin.ModelAdmin):
 
         queryset.bulk_update(objects_to_update, fields=["priority"])
 
+        refresh_taxon_media([taxon_id])
+
+        DataVersion.objects.bump(queryset.model._meta.db_table)
+
         return JsonResponse(
             {
                 "results": [
@@ -286,6 +302,16 @@ class MediaAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
+
+        # status of the latest rendition job, if any
+        qs = qs.annotate(
+            rendition_job_status=Subquery(
+                RenditionJob.objects.filter(media=OuterRef("pk"))
+                .order_by("-id")
+                .values("status")[:1]
+            )
+        )
+
         if request.user.has_perm("media.manage_others"):
             return qs
         return qs.filter(created_by=request.user)
@@ -323,6 +349,13 @@ class MediaAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
         if hasattr(obj, "create_renditions") and callable(obj.create_renditions):
+            self.create_renditions(obj)
+
+    def create_renditions(self, obj):
+        """Create the renditions of obj, or queue a job for it (see settings)."""
+        if settings.MEDIA_RENDITIONS_IN_BACKGROUND:
+            RenditionJob.objects.enqueue(obj)
+        else:
             obj.create_renditions()
 
     def add_view(self, request, form_url="", extra_context=False):
@@ -437,6 +470,15 @@ class MediaAdmin(admin.ModelAdmin):
     change_taxon_action.short_description = "Change taxon for selected images"
 
     def recreate_renditions_action(self, request, queryset):
+        if settings.MEDIA_RENDITIONS_IN_BACKGROUND:
+            for obj in queryset:
+                RenditionJob.objects.enqueue(obj)
+            self.message_user(
+                request,
+                f"Queued recreating renditions for {queryset.count()} images.",
+            )
+            return
+
         success_count = 0
         fail_count = 0
         for obj in queryset:
@@ -545,166 +587,84 @@ class ImageLabelingAdmin(MediaAdmin):
             super().save_model(request, obj, form, change)
 
             if hasattr(obj, "create_renditions") and callable(obj.create_renditions):
-                obj.create_renditions()
+                self.create_renditions(obj)
 
     def _process_zip_upload(self, request, template_obj, zip_file):
-        """Extract ZIP and create multiple images"""
-        import os
-        import zipfile
-        from io import BytesIO
-
-        from django.core.files.uploadedfile import InMemoryUploadedFile
+        """Queue a job creating images from the entries of a ZIP archive"""
         from django.utils.text import slugify
 
-        try:
-            # Get the ZIP filename at the start
-            zip_filename = getattr(zip_file, "name", "ZIP archive")
-
-            with zipfile.ZipFile(zip_file, "r") as zip_ref:
-                # Get image files
-                image_files = [
-                    f
-                    for f in zip_ref.namelist()
-                    if f.lower().endswith((".png", ".jpg", ".jpeg", ".tif", ".tiff"))
-                    and not f.startswith("__MACOSX")
-                    and not f.startswith(".")
-                    and not os.path.basename(f).startswith(".")
-                ]
+        zip_filename = getattr(zip_file, "name", "ZIP archive")
 
-                if not image_files:
-                    messages.error(request, "No valid image files found in ZIP")
-                    return
-
-                created_count = 0
-                failed_count = 0
-                taxon = template_obj.taxon
-
-                # Determine the slug prefix and title
-                if taxon:
-                    slug_prefix = taxon.slug
-                    title = template_obj.attributes.get("title", taxon.scientific_name)
-                else:
-                    # No taxon - use title for slug prefix, or "unknown" as fallback
-                    title = template_obj.attributes.get("title", "")
-                    if not title:
-                        messages.error(
-                            request,
-                            "Title (class name) is required for ZIP upload without taxon",
-                        )
-                        return
-                    slug_prefix = slugify(title) or "unknown"
-
-                # Get metadata from the form (shared across all images)
-                shared_metadata = template_obj.attributes.copy()
-
-                # Find the next available number for this slug prefix
-                from media.models import Image as BaseImage
-
-                existing_images = BaseImage.objects.filter(
-                    slug__startswith=f"{slug_prefix}-"
-                ).order_by("-slug")
-
-                # Extract numbers from existing slugs to find the highest
-                start_idx = 1
-                if existing_images.exists():
-                    for img in existing_images:
-                        slug_parts = img.slug.split("-")
-                        if slug_parts[-1].isdigit():
-                            start_idx = max(start_idx, int(slug_parts[-1]) + 1)
-
-                for idx, filename in enumerate(sorted(image_files), start=start_idx):
-                    try:
-                        # Read image data
-                        image_data = zip_ref.read(filename)
-                        file_obj = BytesIO(image_data)
-
-                        # Create slug with running number (for uniqueness)
-                        slug = slugify(f"{slug_prefix}-{idx}")
-
-                        # Double-check uniqueness
-                        counter = 1
-                        original_slug = slug
-                        while BaseImage.objects.filter(slug=slug).exists():
-                            slug = f"{original_slug}-{counter}"
-                            counter += 1
-
-                        # Get file extension
-                        _, ext = os.path.splitext(filename)
-                        ext = ext.lower()
-
-                        # Determine content type
-                        content_type_map = {
-                            ".png": "image/png",
-                            ".jpg": "image/jpeg",
-                            ".jpeg": "image/jpeg",
-                            ".tif": "image/tiff",
-                            ".tiff": "image/tiff",
-                        }
-                        content_type = content_type_map.get(ext, "image/jpeg")
-
-                        # Use atomic transaction for each image
-                        with transaction.atomic():
-                            # Create new Image object with shared metadata
-                            # Title stays the same (no number), only slug has number
-                            img = ImageLabelingImage(
-                                slug=slug,
-                                taxon=taxon,
-                                type=content_type,
-                                attributes={
-                                    **shared_metadata,
-                                    "title": title,
-                                },  # title without number
-                                created_by=request.user,
-                                created_at=timezone.now(),
-                            )
-
-                            # Save file (filename gets the number from slug)
-                            img.file.save(
-                                f"{slug}{ext}",
-                                InMemoryUploadedFile(
-                                    file_obj,
-                                    None,
-                                    f"{slug}{ext}",
-                                    content_type,
-                                    len(image_data),
-                                    None,
-                                ),
-                                save=True,
-                            )
-
-                            # Create renditions
-                            if hasattr(img, "create_renditions"):
-                                img.create_renditions()
-
-                            created_count += 1
-
-                    except Exception as e:
-                        failed_count += 1
-                        print(f"Error processing {filename}: {e!s}")
-                        import traceback
-
-                        traceback.print_exc()
-
-                if created_count > 0:
-                    messages.success(
-                        request,
-                        f"Successfully created {created_count} images "
-                        f"from {zip_filename}",
-                    )
-                if failed_count > 0:
-                    messages.warning(
-                        request,
-                        f"Failed to create {failed_count} images. "
-                        "Check server logs for details.",
-                    )
+        taxon = template_obj.taxon
+
+        # Determine the slug prefix and title
+        if taxon:
+            slug_prefix = taxon.slug
+            title = template_obj.attributes.get("title", taxon.scientific_name)
+        else:
+            # No taxon - use title for slug prefix, or "unknown" as fallback
+            title = template_obj.attributes.get("title", "")
+            if not title:
+                messages.error(
+                    request,
+                    "Title (class name) is required for ZIP upload without taxon",
+                )
+                return
+            slug_prefix = slugify(title) or "unknown"
+
+        # Metadata from the form is shared across all images, title included
+        job = ZipUploadJob(
+            filename=zip_filename,
+            taxon=taxon,
+            slug_prefix=slug_prefix,
+            attributes={**template_obj.attributes, "title": title},
+            created_by=request.user,
+        )
+        job.file.save(zip_filename, zip_file, save=True)
+
+        job_url = reverse("admin:media_zipuploadjob_change", args=[job.pk])
+
+        if settings.MEDIA_RENDITIONS_IN_BACKGROUND:
+            messages.success(
+                request,
+                format_html(
+                    'Queued creating images from {}. See <a href="{}">its progress</a>.',
+                    zip_filename,
+                    job_url,
+                ),
+            )
+            return
 
-        except zipfile.BadZipFile:
-            messages.error(request, "Invalid ZIP file")
-        except Exception as e:
-            messages.error(request, f"Error processing ZIP: {e!s}")
-            import traceback
+        job.status = ZipUploadJob.Status.RUNNING
+        job.attempts = 1
+        job.save(update_fields=["status", "attempts"])
+        job.run(retry=False)
 
-            print(traceback.format_exc())
+        if job.status == ZipUploadJob.Status.FAILED:
+            messages.error(
+                request,
+                format_html(
+                    'Failed to create images from {}: {}. See <a href="{}">the job</a>.',
+                    zip_filename,
+                    job.error,
+                    job_url,
+                ),
+            )
+            return
+
+        number_of_failed_entries = sum("error" in result for result in job.results)
+
+        messages.add_message(
+            request,
+            messages.WARNING if number_of_failed_entries else messages.SUCCESS,
+            format_html(
+                'Created {} of {} images from {}. See <a href="{}">the results</a>.',
+                len(job.results) - number_of_failed_entries,
+                job.entry_count,
+                zip_filename,
+                job_url,
+            ),
+        )
 
     def response_add(self, request, obj, post_url_continue=None):
         """
@@ -722,5 +682,67 @@ class ImageLabelingAdmin(MediaAdmin):
         return super().response_add(request, obj, post_url_continue)
 
 
+class RenditionJobAdmin(admin.ModelAdmin):
+    list_display = ("media", "status", "attempts", "updated_at", "error")
+    list_filter = ("status",)
+    list_select_related = ("media",)
+    ordering = ("-id",)
+
+    actions: ClassVar[list[str]] = ["retry_action"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Retry selected failed jobs")
+    def retry_action(self, request, queryset):
+        count = queryset.filter(status=RenditionJob.Status.FAILED).update(
+            status=RenditionJob.Status.QUEUED,
+            attempts=0,
+            error="",
+            run_after=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        self.message_user(request, f"Queued {count} jobs again.")
+
+
+class ZipUploadJobAdmin(admin.ModelAdmin):
+    list_display = ("filename", "taxon", "status", "progress", "created_by", "updated_at")
+    list_filter = ("status",)
+    list_select_related = ("taxon", "created_by")
+    ordering = ("-id",)
+
+    fields = ("filename", "taxon", "status", "progress", "error", "entry_results")
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Progress")
+    def progress(self, obj):
+        return f"{len(obj.results)} of {obj.entry_count}"
+
+    @admin.display(description="Results")
+    def entry_results(self, obj):
+        return format_html(
+            "<ul>{}</ul>",
+            format_html_join(
+                "",
+                "<li>{}: {}</li>",
+                (
+                    (result["entry"], result.get("slug") or result.get("error"))
+                    for result in obj.results
+                ),
+            ),
+        )
+
+
 admin.site.register(Image, ImageAdmin)
 admin.site.register(ImageLabelingImage, ImageLabelingAdmin)
+admin.site.register(RenditionJob, RenditionJobAdmin)
+admin.site.register(ZipUploadJob, ZipUploadJobAdmin)
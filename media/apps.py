@@ -9,7 +9,11 @@ class MediaConfig(AppConfig):
     name = "media"
 
     def ready(self):
-        from .models import remove_file_on_delete
+        from .models import (
+            bump_data_version_on_delete,
+            refresh_taxon_media_on_delete,
+            remove_file_on_delete,
+        )
 
         # connect signal receivers to each model class as sender
         for media_model in get_media_models():
@@ -17,3 +21,20 @@ class MediaConfig(AppConfig):
             post_delete.connect(
                 remove_file_on_delete, sender=media_model, dispatch_uid=dispatch_uid
             )
+
+        for media_model in get_media_models(include_base=True):
+            dispatch_uid = "%s.bump_data_version_on_delete" % media_model.__name__.lower()
+            post_delete.connect(
+                bump_data_version_on_delete,
+                sender=media_model,
+                dispatch_uid=dispatch_uid,
+            )
+
+            dispatch_uid = "%s.refresh_taxon_media_on_delete" % (
+                media_model.__name__.lower()
+            )
+            post_delete.connect(
+                refresh_taxon_media_on_delete,
+                sender=media_model,
+                dispatch_uid=dispatch_uid,
+            )
@@ -0,0 +1,137 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+
+from media.views import ImageLabelingCollectionView, MediaCollectionView
+from taxa.views import SynonymCollectionView, TaxonCollectionView
+
+# Filters offered by the REST API as (endpoint, view class, query parameters).
+API_FILTERS = (
+    ("/api/taxa/", TaxonCollectionView, {"name": "Dinophysis"}),
+    ("/api/taxa/", TaxonCollectionView, {"rank": "Species"}),
+    ("/api/taxa/", TaxonCollectionView, {"group": "all"}),
+    ("/api/taxa/", TaxonCollectionView, {"group": "diatoms"}),
+    ("/api/taxa/", TaxonCollectionView, {"culture-collection": "NORCCA"}),
+    ("/api/taxa/", TaxonCollectionView, {"harmful-only": "true"}),
+    ("/api/taxa/", TaxonCollectionView, {"helcom-eg-phyto-only": "true"}),
+    ("/api/synonyms/", SynonymCollectionView, {"taxon": "dinophysis-arctica"}),
+    ("/api/media/", MediaCollectionView, {"artist": "Marie Johansen"}),
+    (
+        "/api/media/",
+        MediaCollectionView,
+        {"gallery": "HELCOM EG Phyto", "include_subgalleries": "false"},
+    ),
+    ("/api/media/image_labeling/", ImageLabelingCollectionView, {}),
+)
+
+
+FULL_SCAN_NODE_TYPES = ("Seq Scan", "Index Scan", "Index Only Scan")
+
+
+def get_plan_nodes(plan):
+    yield plan
+    for subplan in plan.get("Plans", []):
+        yield from get_plan_nodes(subplan)
+
+
+def get_index_conditions(plan, partial_indexes):
+    """
+    Return the index conditions in plan as (index name, condition) pairs.
+    Partial indexes are included even when scanned without conditions, as
+    their predicate is a condition in itself.
+    """
+    conditions = set()
+
+    for node in get_plan_nodes(plan):
+        if "Index Cond" in node:
+            conditions.add((node["Index Name"], node["Index Cond"]))
+        elif node.get("Index Name") in partial_indexes:
+            conditions.add((node["Index Name"], None))
+
+    return conditions
+
+
+def get_full_scans(plan, partial_indexes):
+    """Return the relations scanned in full, i.e. without index conditions."""
+    return {
+        node["Relation Name"]
+        for node in get_plan_nodes(plan)
+        if node["Node Type"] in FULL_SCAN_NODE_TYPES
+        and "Index Cond" not in node
+        and node.get("Index Name") not in partial_indexes
+    }
+
+
+def get_partial_index_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexrelid::regclass::text FROM pg_index WHERE indpred IS NOT NULL"
+        )
+        return {name for (name,) in cursor.fetchall()}
+
+
+def get_queryset(path, view_class, params):
+    view = view_class()
+    view.setup(RequestFactory().get(path, params))
+    return view.get_queryset()
+
+
+def get_plan(queryset):
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return json.loads(queryset.explain(format="json"))[0]["Plan"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Report which filters in the REST API can be answered using indexes. "
+        "Sequential scans are disabled while planning, so a filter is reported "
+        "as index-backed if the planner is able to use an index for it at all. "
+        "Only index conditions that are not in the plan without the filter "
+        "count, so indexes used by the view itself are not attributed to it."
+    )
+
+    def handle(self, *args, **options):
+        number_of_unindexed = 0
+
+        partial_indexes = get_partial_index_names()
+
+        for path, view_class, params in API_FILTERS:
+            plan = get_plan(get_queryset(path, view_class, params))
+
+            conditions = get_index_conditions(plan, partial_indexes)
+            if params:
+                # conditions of the view itself, e.g. the image labeling filter
+                baseline_plan = get_plan(get_queryset(path, view_class, {}))
+                conditions -= get_index_conditions(baseline_plan, partial_indexes)
+
+            indexes = {name for name, _condition in conditions}
+
+            description = "%s?%s" % (
+                path,
+                "&".join("%s=%s" % item for item in params.items()),
+            )
+
+            if not indexes:
+                number_of_unindexed = number_of_unindexed + 1
+                full_scans = get_full_scans(plan, partial_indexes)
+                if full_scans:
+                    problem = "full scan on %s" % ", ".join(sorted(full_scans))
+                else:
+                    problem = "not in any index condition"
+                self.stdout.write(self.style.WARNING("%s: %s" % (description, problem)))
+            else:
+                self.stdout.write(
+                    "%s: index-backed (%s)" % (description, ", ".join(sorted(indexes)))
+                )
+
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    "Checked %u filters, %u not backed by indexes."
+                    % (len(API_FILTERS), number_of_unindexed)
+                )
+            )
@@ -1,18 +1,82 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.apps import apps
+from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
+from media.models import Media, refresh_taxon_media
 from media.renditions import get_registered_models
+from synchronization.models import DataVersion
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, "r", encoding="utf8") as infile:
+        return json.load(infile)
+
+
+def write_checkpoint(path, checkpoint):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    temporary_path = path + ".tmp"
+
+    with open(temporary_path, "w", encoding="utf8") as outfile:
+        json.dump(checkpoint, outfile)
+
+    os.replace(temporary_path, path)
 
 
 def get_registered_models_by_name():
     return {cls.__name__.lower(): cls for cls in get_registered_models()}
 
 
+def render_objects(model_label, pks, force=False):
+    """
+    Create rendition files for the objects with the given primary keys,
+    without saving the objects. Return a (pk, renditions, fingerprint, error)
+    tuple for each object, where error is None if it succeeded and renditions
+    is None if they were already up to date (unless force is set).
+    """
+    model_class = apps.get_model(model_label)
+
+    results = []
+
+    for obj in model_class.objects.filter(pk__in=pks).order_by("pk"):
+        try:
+            # read once, for both the fingerprint and the renditions
+            content = obj.read_source()
+            if not force and obj.has_current_renditions(content):
+                results.append((obj.pk, None, None, None))
+                continue
+            obj.render_renditions(content)
+        except Exception as exc:
+            error = "%s: %s" % (type(exc).__name__, exc)
+            results.append((obj.pk, None, None, error))
+        else:
+            results.append((obj.pk, obj.renditions, obj.renditions_fingerprint, None))
+        finally:
+            obj.file.close()
+
+    return results
+
+
 class Command(BaseCommand):
     help = (
         "Generate all kind of file representations "
-        "(e.g. thumbnails), for all kind of Media objects."
+        "(e.g. thumbnails), for all kind of Media objects. Objects with "
+        "renditions created from the same file and settings are skipped. "
+        "If a previous run was interrupted, it is resumed from its checkpoint."
     )
 
+    # Number of objects rendered by a worker before the results are saved
+    chunk_size = 20
+
     def add_arguments(self, parser):
         parser.add_argument(
             "args",
@@ -24,10 +88,35 @@ class Command(BaseCommand):
                 "all registered model classes will be used."
             ),
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "Number of processes to create renditions in. "
+                "Defaults to 1, i.e. everything is done in this process."
+            ),
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Create renditions also for objects that are already up to date.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            default=os.path.join(settings.DATA_DIR, "createrenditions.checkpoint"),
+            help=(
+                "Path to the file keeping track of progress, which is removed "
+                "when all objects have been processed."
+            ),
+        )
 
     def handle(self, *model_names, **options):
         verbosity = options["verbosity"]
 
+        if options["workers"] < 1:
+            raise CommandError("The number of workers must be at least 1.")
+
         registered_models = get_registered_models_by_name()
 
         model_names = model_names or registered_models.keys()
@@ -44,27 +133,146 @@ class Command(BaseCommand):
 
             model_classes.append(registered_models.get(model_name))
 
+        checkpoint_path = options["checkpoint"]
+        checkpoint = read_checkpoint(checkpoint_path)
+
         number_of_processed_objects = 0
+        number_of_skipped_objects = 0
+        number_of_failed_objects = 0
 
         for model_class in model_classes:
-            queryset = model_class.objects.all()
-            total_count = queryset.count()
+            model_label = model_class._meta.label_lower
+
+            queryset = model_class.objects.order_by("pk")
+
+            if model_label in checkpoint:
+                queryset = queryset.filter(pk__gt=checkpoint[model_label])
 
-            for count, obj in enumerate(queryset, start=1):
                 if verbosity > 0:
                     self.stdout.write(
-                        "Processing '%s' %u of %u."
-                        % (model_class.__name__, count, total_count)
+                        "Resuming '%s' after id %s."
+                        % (model_class.__name__, checkpoint[model_label])
                     )
 
-                obj.create_renditions()
-                obj.file.close()
+            pks = list(queryset.values_list("pk", flat=True))
+            total_count = len(pks)
+
+            chunks = [
+                pks[start : start + self.chunk_size]
+                for start in range(0, total_count, self.chunk_size)
+            ]
+
+            # chunks may complete out of order, the checkpoint is only moved
+            # past chunks that completed together with all chunks before them
+            completed_chunks = set()
+            number_of_completed_chunks = 0
+
+            count = 0
+
+            for index, results in self.render_chunks(
+                model_class, chunks, options["workers"], options["force"]
+            ):
+                self.save_results(model_class, results)
+
+                completed_chunks.add(index)
+                while number_of_completed_chunks in completed_chunks:
+                    number_of_completed_chunks = number_of_completed_chunks + 1
 
-                number_of_processed_objects = number_of_processed_objects + 1
+                if number_of_completed_chunks > 0:
+                    checkpoint[model_label] = chunks[number_of_completed_chunks - 1][-1]
+                    write_checkpoint(checkpoint_path, checkpoint)
+
+                for pk, renditions, _fingerprint, error in results:
+                    count = count + 1
+
+                    if error is None and renditions is None:
+                        number_of_skipped_objects = number_of_skipped_objects + 1
+                    elif error is None:
+                        number_of_processed_objects = number_of_processed_objects + 1
+                    else:
+                        number_of_failed_objects = number_of_failed_objects + 1
+                        self.stderr.write(
+                            "Failed to process '%s' with id %s: %s"
+                            % (model_class.__name__, pk, error)
+                        )
+
+                    if verbosity > 0:
+                        self.stdout.write(
+                            "Processed '%s' %u of %u."
+                            % (model_class.__name__, count, total_count)
+                        )
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
 
         if verbosity > 0:
             self.stdout.write(
                 self.style.SUCCESS(
-                    "Successfully processed %u objects." % number_of_processed_objects
+                    "Successfully processed %u objects, %u were already up to date."
+                    % (number_of_processed_objects, number_of_skipped_objects)
                 )
             )
+
+        if number_of_failed_objects:
+            raise CommandError("Failed to process %u objects." % number_of_failed_objects)
+
+    def render_chunks(self, model_class, chunks, workers, force=False):
+        """
+        Yield the index and the results of render_objects for each chunk,
+        as completed.
+        """
+        model_label = model_class._meta.label_lower
+
+        if workers == 1:
+            for index, chunk in enumerate(chunks):
+                yield index, render_objects(model_label, chunk, force)
+            return
+
+        # connections must not be shared with forked worker processes
+        connections.close_all()
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup
+        ) as executor:
+            futures = {
+                executor.submit(render_objects, model_label, chunk, force): index
+                for index, chunk in enumerate(chunks)
+            }
+
+            for future in as_completed(futures):
+                index = futures[future]
+
+                try:
+                    results = future.result()
+                except Exception as exc:
+                    error = "%s: %s" % (type(exc).__name__, exc)
+                    results = [(pk, None, None, error) for pk in chunks[index]]
+
+                yield index, results
+
+    def save_results(self, model_class, results):
+        """Store the renditions of the objects that succeeded, in bulk."""
+        objs = [
+            model_class(pk=pk, renditions=renditions, renditions_fingerprint=fingerprint)
+            for pk, renditions, fingerprint, error in results
+            if error is None and renditions is not None
+        ]
+
+        if not objs:
+            return
+
+        with transaction.atomic():
+            model_class.objects.bulk_update(
+                objs, ["renditions", "renditions_fingerprint"]
+            )
+
+            # renditions of the primary image are stored on each taxon
+            refresh_taxon_media(
+                set(
+                    model_class.objects.filter(
+                        pk__in=[obj.pk for obj in objs]
+                    ).values_list("taxon_id", flat=True)
+                )
+            )
+
+            DataVersion.objects.bump(Media._meta.db_table)
@@ -4,7 +4,7 @@ from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from media.models import Media
+from media.models import Media, defer_taxon_media_refresh
 from taxa.models import Taxon
 
 UserModel = get_user_model()
@@ -85,7 +85,8 @@ class Command(BaseCommand):
         number_of_saved_objects = 0
 
         try:
-            with transaction.atomic(savepoint=False):
+            # taxa are refreshed, and the data version bumped, once at the end
+            with transaction.atomic(savepoint=False), defer_taxon_media_refresh():
                 if clear_existing_objects:
                     Media.objects.all().delete()
 
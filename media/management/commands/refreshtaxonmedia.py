@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from media.models import Media, refresh_taxon_media
+from synchronization.models import DataVersion
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the primary image and the media counts stored on each taxon. "
+        "These are kept up to date when media is changed, so this is only "
+        "needed after changing media outside of Django."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            number_of_taxa = refresh_taxon_media()
+
+            DataVersion.objects.bump(Media._meta.db_table)
+
+        if options["verbosity"] > 0:
+            self.stdout.write(
+                self.style.SUCCESS("Refreshed media for %u taxa." % number_of_taxa)
+            )
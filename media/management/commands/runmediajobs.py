@@ -0,0 +1,88 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from media.models import BackgroundJob, RenditionJob, ZipUploadJob
+
+# Kinds of jobs, in the order they are picked from the queues
+JOB_MODELS = (ZipUploadJob, RenditionJob)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued media jobs, i.e. ZIP uploads and renditions for media "
+        "uploaded in the admin. Keeps waiting for new jobs unless --once is "
+        "given. Several workers may run at the same time."
+    )
+
+    # Jobs running for longer than this are assumed to belong to a worker
+    # that stopped, and are queued again when a worker starts
+    stale_after = timedelta(hours=1)
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when there are no more jobs due, instead of waiting for new ones.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Number of seconds to wait before checking for new jobs again.",
+        )
+
+    def handle(self, *args, **options):
+        verbosity = options["verbosity"]
+
+        for job_model in JOB_MODELS:
+            number_of_requeued_jobs, number_of_failed_jobs = (
+                job_model.objects.requeue_stale(timezone.now() - self.stale_after)
+            )
+
+            if number_of_requeued_jobs and verbosity > 0:
+                self.stdout.write(
+                    "Queued %u stale %s objects again."
+                    % (number_of_requeued_jobs, job_model.__name__)
+                )
+
+            if number_of_failed_jobs:
+                self.stderr.write(
+                    "Failed %u stale %s objects that used up their attempts."
+                    % (number_of_failed_jobs, job_model.__name__)
+                )
+
+        while True:
+            job = self.claim()
+
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            job.run()
+
+            if job.status == BackgroundJob.Status.DONE:
+                if verbosity > 0:
+                    self.stdout.write("Completed %s %s." % (type(job).__name__, job.pk))
+            else:
+                self.stderr.write(
+                    "Failed %s %s (attempt %u of %u): %s"
+                    % (
+                        type(job).__name__,
+                        job.pk,
+                        job.attempts,
+                        job.max_attempts,
+                        job.error,
+                    )
+                )
+
+    def claim(self):
+        for job_model in JOB_MODELS:
+            job = job_model.objects.claim()
+            if job is not None:
+                return job
+        return None
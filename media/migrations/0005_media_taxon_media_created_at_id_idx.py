@@ -0,0 +1,21 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0004_convert_institute_to_array"),
+        ("taxa", "0005_taxon_taxon_scientific_name_id_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="media",
+            index=models.Index(
+                fields=["created_at", "id"], name="taxon_media_created_at_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:49
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0005_media_taxon_media_created_at_id_idx"),
+        ("taxa", "0006_taxon_taxon_rank_idx_taxon_taxon_rank_upper_idx_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="media",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["attributes"],
+                name="taxon_media_attributes_gin_idx",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="media",
+            index=models.Index(
+                django.db.models.fields.json.KeyTransform("imagelabeling", "attributes"),
+                name="taxon_media_imagelabeling_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="media",
+            index=models.Index(
+                condition=models.Q(("attributes__imagelabeling", True)),
+                fields=["taxon", "priority"],
+                name="taxon_media_il_taxon_prio_idx",
+            ),
+        ),
+    ]
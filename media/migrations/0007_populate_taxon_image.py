@@ -0,0 +1,30 @@
+from django.db import migrations
+from django.db.models import OuterRef, Q, Subquery
+
+
+def populate_taxon_images(apps, schema_editor):
+    """Store the primary image on already imported taxa"""
+    Media = apps.get_model("media", "Media")
+    Taxon = apps.get_model("taxa", "Taxon")
+
+    primary_image = (
+        Media.objects.filter(taxon=OuterRef("pk"), type__startswith="image/")
+        .filter(
+            Q(attributes__imagelabeling__isnull=True) | Q(attributes__imagelabeling=False)
+        )
+        .order_by("priority")
+        .values("renditions")[:1]
+    )
+
+    Taxon.objects.update(image=Subquery(primary_image))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0006_media_taxon_media_attributes_gin_idx_and_more"),
+        ("taxa", "0010_taxon_image"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_taxon_images, migrations.RunPython.noop),
+    ]
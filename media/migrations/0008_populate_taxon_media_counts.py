@@ -0,0 +1,39 @@
+from django.db import migrations
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_media(queryset):
+    counted_queryset = queryset.order_by().values("taxon").annotate(count=Count("*"))
+    return Coalesce(Subquery(counted_queryset.values("count")), 0)
+
+
+def populate_taxon_media_counts(apps, schema_editor):
+    """Count media for already imported taxa"""
+    Media = apps.get_model("media", "Media")
+    Taxon = apps.get_model("taxa", "Taxon")
+
+    taxon_media = Media.objects.filter(taxon=OuterRef("pk"))
+
+    Taxon.objects.update(
+        media_count=count_media(
+            taxon_media.filter(
+                Q(attributes__imagelabeling__isnull=True)
+                | Q(attributes__imagelabeling=False)
+            )
+        ),
+        image_labeling_media_count=count_media(
+            taxon_media.filter(attributes__imagelabeling=True)
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0007_populate_taxon_image"),
+        ("taxa", "0011_taxon_media_counts"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_taxon_media_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.13 on 2026-10-18 03:31
+
+from django.db import migrations, models
+
+
+def move_renditions_fingerprints(apps, schema_editor):
+    """Move fingerprints out of renditions, which are served by the API"""
+    Media = apps.get_model("media", "Media")
+    Taxon = apps.get_model("taxa", "Taxon")
+
+    media = list(Media.objects.filter(renditions__has_key="fingerprint"))
+    for obj in media:
+        obj.renditions_fingerprint = obj.renditions.pop("fingerprint")
+    Media.objects.bulk_update(
+        media, ["renditions", "renditions_fingerprint"], batch_size=1000
+    )
+
+    # renditions of the primary image are copied to the taxon
+    taxa = list(Taxon.objects.filter(image__has_key="fingerprint"))
+    for taxon in taxa:
+        del taxon.image["fingerprint"]
+    Taxon.objects.bulk_update(taxa, ["image"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("media", "0010_zipuploadjob"),
+        ("taxa", "0011_taxon_media_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="media",
+            name="renditions_fingerprint",
+            field=models.CharField(blank=True, default="", editable=False, max_length=64),
+        ),
+        migrations.RunPython(move_renditions_fingerprints, migrations.RunPython.noop),
+    ]
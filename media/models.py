@@ -1,15 +1,26 @@
 import itertools
 import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
 from typing import ClassVar
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.core.files.base import ContentFile
 from django.core.serializers.json import DjangoJSONEncoder
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.fields.json import KeyTransform
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
 
 from media import renditions
-from media.storage import default_origin_storage
+from media.storage import default_origin_storage, default_upload_storage
+from synchronization.models import DataVersion
 from taxa.models import Taxon
 
 
@@ -36,6 +47,77 @@ def available_priorities(taxon=None):
     return filter(lambda p: p not in preexisting_priorities, incrementing_priority)
 
 
+def count_media(queryset):
+    counted_queryset = queryset.order_by().values("taxon").annotate(count=Count("*"))
+    return Coalesce(Subquery(counted_queryset.values("count")), 0)
+
+
+def refresh_taxon_media(taxon_ids=None):
+    """
+    Store the renditions of the first public image, by priority, and the
+    number of public and image labeling media on each taxon. All taxa are
+    refreshed unless taxon_ids is given.
+    """
+    is_public = Q(attributes__imagelabeling__isnull=True) | Q(
+        attributes__imagelabeling=False
+    )
+
+    primary_image = (
+        Image.objects.filter(taxon=OuterRef("pk"))
+        .filter(is_public)
+        .order_by("priority")
+        .values("renditions")[:1]
+    )
+
+    taxon_media = Media.objects.filter(taxon=OuterRef("pk"))
+
+    queryset = Taxon.objects.all()
+
+    if taxon_ids is not None:
+        queryset = queryset.filter(pk__in=[pk for pk in taxon_ids if pk is not None])
+
+    return queryset.update(
+        image=Subquery(primary_image),
+        media_count=count_media(taxon_media.filter(is_public)),
+        image_labeling_media_count=count_media(
+            taxon_media.filter(attributes__imagelabeling=True)
+        ),
+    )
+
+
+# Taxa to refresh at the end of defer_taxon_media_refresh(), or None outside it
+_deferred_taxon_ids = ContextVar("deferred_taxon_ids", default=None)
+
+
+@contextmanager
+def defer_taxon_media_refresh():
+    """
+    Refresh the media of the taxa touched by media saved or deleted in the
+    block, and bump the data version, once when leaving it instead of for
+    each object. Nothing is refreshed if the block raises an exception.
+    """
+    taxon_ids = set()
+
+    token = _deferred_taxon_ids.set(taxon_ids)
+    try:
+        yield
+    finally:
+        _deferred_taxon_ids.reset(token)
+
+    refresh_taxon_media(taxon_ids)
+    DataVersion.objects.bump(Media._meta.db_table)
+
+
+def taxon_media_changed(taxon_ids):
+    """Refresh the media of the given taxa, unless deferred."""
+    deferred_taxon_ids = _deferred_taxon_ids.get()
+
+    if deferred_taxon_ids is None:
+        refresh_taxon_media(taxon_ids)
+    else:
+        deferred_taxon_ids.update(pk for pk in taxon_ids if pk is not None)
+
+
 def primary_path_for_media(instance, filename):
     _file_root, file_ext = os.path.splitext(filename)
     return str(instance.slug) + str(file_ext)
@@ -99,11 +181,40 @@ class Media(models.Model, renditions.ModelActionsMixin):
     attributes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
     renditions = models.JSONField(default=dict)
 
+    # fingerprint of what the renditions were created from, kept out of
+    # renditions as those are served by the API
+    renditions_fingerprint = models.CharField(
+        max_length=64, blank=True, default="", editable=False
+    )
+
     objects = MediaManager()
 
     class Meta:
         db_table = "taxon_media"
 
+        indexes: ClassVar[list] = [
+            models.Index(
+                fields=["created_at", "id"],
+                name="taxon_media_created_at_id_idx",
+            ),
+            # for artist and gallery filters
+            GinIndex(
+                fields=["attributes"],
+                opclasses=["jsonb_path_ops"],
+                name="taxon_media_attributes_gin_idx",
+            ),
+            # for separating image labeling images from other media
+            models.Index(
+                KeyTransform("imagelabeling", "attributes"),
+                name="taxon_media_imagelabeling_idx",
+            ),
+            models.Index(
+                fields=["taxon", "priority"],
+                condition=models.Q(attributes__imagelabeling=True),
+                name="taxon_media_il_taxon_prio_idx",
+            ),
+        ]
+
         constraints: ClassVar[list] = [
             models.UniqueConstraint(
                 fields=["taxon", "priority"],
@@ -132,7 +243,12 @@ class Media(models.Model, renditions.ModelActionsMixin):
         if changed_taxon or self.priority is None:
             setattr(self, "priority", next(available_priorities(self.taxon)))
 
-        return super().save(*args, **kwargs)
+        super().save(*args, **kwargs)
+
+        taxon_media_changed({self.taxon_id, origin_obj and origin_obj.taxon_id})
+
+        if _deferred_taxon_ids.get() is None:
+            DataVersion.objects.bump(self._meta.db_table)
 
     @property
     def title(self):
@@ -168,6 +284,361 @@ class ImageLabelingImage(Image):  # inherit from Image
         verbose_name_plural = "Labeling Guide Images"
 
 
+class BackgroundJobQuerySet(models.QuerySet):
+    def claim(self):
+        """
+        Mark the next job that is due as running and return it, or None if
+        there is none. Jobs claimed by other workers are skipped.
+        """
+        with transaction.atomic():
+            job = (
+                self.select_for_update(skip_locked=True)
+                .filter(status=BackgroundJob.Status.QUEUED, run_after__lte=timezone.now())
+                .order_by("run_after", "id")
+                .first()
+            )
+
+            if job is None:
+                return None
+
+            job.status = BackgroundJob.Status.RUNNING
+            job.attempts = job.attempts + 1
+            job.updated_at = timezone.now()
+            job.save(update_fields=["status", "attempts", "updated_at"])
+
+        return job
+
+    def requeue_stale(self, running_since):
+        """
+        Queue jobs again that have been running since before running_since,
+        e.g. because the worker was stopped, or mark them as failed if they
+        have used up their attempts. Return the number of jobs queued again
+        and the number of jobs failed.
+        """
+        now = timezone.now()
+
+        stale_jobs = self.filter(
+            status=BackgroundJob.Status.RUNNING, updated_at__lt=running_since
+        )
+
+        number_of_failed_jobs = stale_jobs.filter(
+            attempts__gte=self.model.max_attempts
+        ).update(
+            status=BackgroundJob.Status.FAILED,
+            error="Stopped while running, after %u attempts." % self.model.max_attempts,
+            updated_at=now,
+        )
+
+        number_of_requeued_jobs = stale_jobs.filter(
+            attempts__lt=self.model.max_attempts
+        ).update(status=BackgroundJob.Status.QUEUED, updated_at=now)
+
+        return number_of_requeued_jobs, number_of_failed_jobs
+
+
+class BackgroundJob(models.Model):
+    """
+    Work run by the runmediajobs command instead of in the request that
+    caused it. Subclasses implement process().
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    status = models.CharField(
+        max_length=16, choices=Status.choices, default=Status.QUEUED
+    )
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    # queued jobs are not run before this, used for delaying retries
+    run_after = models.DateTimeField(default=timezone.now)
+
+    max_attempts = 3
+
+    # delay before retrying, multiplied by the number of attempts so far
+    retry_delay = timedelta(minutes=1)
+
+    objects = BackgroundJobQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def process(self):
+        raise NotImplementedError("Subclasses must implement process() method.")
+
+    def run(self, retry=True):
+        """
+        Process the job, then mark it as done, or as queued for another
+        attempt or failed if it did not succeed. Without retry, e.g. when run
+        in a request rather than by a worker, it fails at the first attempt.
+        """
+        try:
+            self.process()
+        except Exception as exc:
+            self.error = "%s: %s" % (type(exc).__name__, exc)
+
+            if retry and self.attempts < self.max_attempts:
+                self.status = BackgroundJob.Status.QUEUED
+                self.run_after = timezone.now() + self.retry_delay * self.attempts
+            else:
+                self.status = BackgroundJob.Status.FAILED
+        else:
+            self.error = ""
+            self.status = BackgroundJob.Status.DONE
+
+        self.updated_at = timezone.now()
+
+        # the job may have been deleted meanwhile, e.g. along with its media
+        type(self).objects.filter(pk=self.pk).update(
+            status=self.status,
+            error=self.error,
+            run_after=self.run_after,
+            updated_at=self.updated_at,
+        )
+
+
+class RenditionJobQuerySet(BackgroundJobQuerySet):
+    def enqueue(self, media):
+        """Queue creating the renditions of media, unless it is already queued."""
+        job = self.filter(media=media, status=RenditionJob.Status.QUEUED).first()
+
+        if job is None:
+            job = self.create(media=media)
+
+        return job
+
+
+class RenditionJob(BackgroundJob):
+    """Creation of the renditions of a media object."""
+
+    media = models.ForeignKey(
+        Media, on_delete=models.CASCADE, related_name="rendition_jobs"
+    )
+
+    objects = RenditionJobQuerySet.as_manager()
+
+    class Meta:
+        db_table = "media_rendition_job"
+
+        indexes: ClassVar[list] = [
+            models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(status="queued"),
+                name="media_rendition_job_queue_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return "Renditions of media %s (%s)" % (self.media_id, self.status)
+
+    def process(self):
+        image = Image._base_manager.get(pk=self.media_id)
+        image.create_renditions()
+        image.file.close()
+
+
+IMAGE_CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
+
+def is_image_entry(name):
+    """Return True if name, in a ZIP archive, is an image to upload."""
+    return (
+        name.lower().endswith(tuple(IMAGE_CONTENT_TYPES))
+        and not name.startswith("__MACOSX")
+        and not name.startswith(".")
+        and not os.path.basename(name).startswith(".")
+    )
+
+
+class ZipUploadJob(BackgroundJob):
+    """
+    Creation of image labeling images from the entries of an uploaded ZIP
+    archive, sharing the taxon and attributes given when uploading it.
+
+    Entries are read from the archive one at a time and processed in a pool
+    of threads, each saving the image and creating its renditions. The result
+    of each entry is stored as it completes, and entries that were created by
+    an earlier attempt are skipped. The media of the taxon are refreshed once
+    the entries have been processed, rather than for each image.
+    """
+
+    file = models.FileField(upload_to="zip/", storage=default_upload_storage)
+
+    filename = models.CharField(max_length=255)
+
+    taxon = models.ForeignKey(Taxon, on_delete=models.SET_NULL, blank=True, null=True)
+
+    slug_prefix = models.SlugField(max_length=255)
+
+    attributes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    created_by = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
+
+    entry_count = models.PositiveIntegerField(default=0)
+
+    # {"entry": ..., "slug": ...} or {"entry": ..., "error": ...} per entry
+    results = models.JSONField(default=list)
+
+    max_attempts = 2
+
+    # number of entries processed at the same time
+    threads = 4
+
+    class Meta:
+        db_table = "media_zip_upload_job"
+
+        indexes: ClassVar[list] = [
+            models.Index(
+                fields=["run_after", "id"],
+                condition=models.Q(status="queued"),
+                name="media_zip_upload_job_queue_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return self.filename
+
+    def process(self):
+        with self.file.open("rb"), self.open_archive() as archive:
+            created_entries = {
+                result["entry"] for result in self.results if "slug" in result
+            }
+
+            entries = sorted(name for name in archive.namelist() if is_image_entry(name))
+
+            if not entries:
+                raise ValueError("No valid image files found in ZIP")
+
+            self.entry_count = len(entries)
+            self.results = [result for result in self.results if "slug" in result]
+            self.save_progress()
+
+            entries = [entry for entry in entries if entry not in created_entries]
+
+            slugs = self.get_available_slugs()
+            priorities = available_priorities(self.taxon)
+
+            # slugs and priorities are assigned up front, since the threads
+            # would otherwise compete for the same ones
+            tasks = [(entry, next(slugs), next(priorities)) for entry in entries]
+
+            try:
+                with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                    futures = {
+                        executor.submit(self.create_image, archive, *task): task[0]
+                        for task in tasks
+                    }
+
+                    for future in as_completed(futures):
+                        try:
+                            result = {"entry": futures[future], "slug": future.result()}
+                        except Exception as exc:
+                            result = {
+                                "entry": futures[future],
+                                "error": "%s: %s" % (type(exc).__name__, exc),
+                            }
+
+                        self.results.append(result)
+                        self.save_progress()
+            finally:
+                if tasks:
+                    refresh_taxon_media([self.taxon_id])
+                    DataVersion.objects.bump(Media._meta.db_table)
+
+        # the archive is kept only as long as it may be needed for a retry
+        self.file.delete(save=False)
+        type(self).objects.filter(pk=self.pk).update(file=self.file)
+
+    def open_archive(self):
+        try:
+            return zipfile.ZipFile(self.file)
+        except zipfile.BadZipFile as exc:
+            raise ValueError("Invalid ZIP file") from exc
+
+    def save_progress(self):
+        type(self).objects.filter(pk=self.pk).update(
+            entry_count=self.entry_count,
+            results=self.results,
+            updated_at=timezone.now(),
+        )
+
+    def get_available_slugs(self):
+        """Yield slugs numbered after the highest one in use for the prefix."""
+        start = 1
+
+        for slug in Media.objects.filter(
+            slug__startswith="%s-" % self.slug_prefix
+        ).values_list("slug", flat=True):
+            _, _, number = slug.rpartition("-")
+            if number.isdigit():
+                start = max(start, int(number) + 1)
+
+        for number in itertools.count(start):
+            slug = slugify("%s-%d" % (self.slug_prefix, number))
+            if not Media.objects.filter(slug=slug).exists():
+                yield slug
+
+    def create_image(self, archive, entry, slug, priority):
+        """
+        Create an image from an entry in archive, returning its slug.
+
+        The image is inserted without Media.save(), which would refresh the
+        media of the taxon for each image, and its renditions are created
+        outside of any transaction, so that no locks are held meanwhile.
+        """
+        try:
+            _, ext = os.path.splitext(entry)
+            ext = ext.lower()
+
+            image = ImageLabelingImage(
+                slug=slug,
+                priority=priority,
+                taxon=self.taxon,
+                type=IMAGE_CONTENT_TYPES[ext],
+                attributes=self.attributes,
+                created_by=self.created_by,
+                created_at=timezone.now(),
+            )
+
+            with archive.open(entry) as entry_file:
+                content = entry_file.read()
+
+            image.file.save("%s%s" % (slug, ext), ContentFile(content), save=False)
+            ImageLabelingImage.objects.bulk_create([image])
+
+            try:
+                image.render_renditions(content)
+            except Exception:
+                image.delete()
+                raise
+
+            with transaction.atomic():
+                ImageLabelingImage.objects.filter(pk=image.pk).update(
+                    renditions=image.renditions,
+                    renditions_fingerprint=image.renditions_fingerprint,
+                )
+
+            return slug
+        finally:
+            # each thread has its own connection
+            connection.close()
+
+
 # Signal receivers. Connected to senders in MediaConfig ready.
 def remove_file_on_delete(sender, instance, **kwargs):
     if not instance.file:
@@ -175,3 +646,13 @@ def remove_file_on_delete(sender, instance, **kwargs):
 
     if hasattr(instance.file, "delete") and callable(instance.file.delete):
         instance.file.delete(save=False)
+
+
+def bump_data_version_on_delete(sender, instance, **kwargs):
+    if _deferred_taxon_ids.get() is None:
+        DataVersion.objects.bump(sender._meta.db_table)
+
+
+def refresh_taxon_media_on_delete(sender, instance, **kwargs):
+    if instance.taxon_id is not None:
+        taxon_media_changed([instance.taxon_id])
@@ -1,4 +1,5 @@
 import base64
+import hashlib
 import os
 from io import BytesIO
 from typing import ClassVar
@@ -118,27 +119,47 @@ def _apply_watermark(image, text, position="bottom-right"):
 class Image(Rendition):
     format = "webp"
 
+    # Largest (width, height) of the processed image, None for full size
+    bounds = None
+
+    # Whether other renditions may be processed from the processed image
+    reusable = True
+
+    def create_from_image(self, processed_image):
+        """Like create(), but from an already processed image."""
+        self.storage.delete(self.relative_path)
+
+        output_buffer = self.render_image(processed_image)
+        self.save(output_buffer)
+        output_buffer.close()
+
     def render(self, input_buffer):
+        with PillowImage.open(input_buffer) as image:
+            return self.render_image(self.process(image))
+
+    def render_image(self, processed_image):
         output_buffer = BytesIO()
 
-        with PillowImage.open(input_buffer) as image:
-            processed_image = self.process(image)
-            copyright_stamp = self.instance.attributes.get("copyright_stamp", "")
-            if copyright_stamp and self.label != "s":
-                copyright_stamp_position = (
-                    self.instance.attributes.get("copyright_stamp_position")
-                    or "bottom-right"
-                )
-                if copyright_stamp_position not in VALID_STAMP_POSITIONS:
-                    copyright_stamp_position = "bottom-right"
-                processed_image = _apply_watermark(
-                    processed_image, copyright_stamp, position=copyright_stamp_position
-                )
-            processed_image.save(output_buffer, format=self.format)
+        copyright_stamp = self.instance.attributes.get("copyright_stamp", "")
+        if copyright_stamp and self.label != "s":
+            copyright_stamp_position = (
+                self.instance.attributes.get("copyright_stamp_position") or "bottom-right"
+            )
+            if copyright_stamp_position not in VALID_STAMP_POSITIONS:
+                copyright_stamp_position = "bottom-right"
+            processed_image = _apply_watermark(
+                processed_image, copyright_stamp, position=copyright_stamp_position
+            )
+        processed_image.save(output_buffer, format=self.format)
 
         return output_buffer
 
-    def process(self, image):
+    def process(self, image, source_size=None):
+        """
+        Return image processed for the rendition. If image was processed from
+        the source by another rendition, the size of the source is given as
+        source_size, so that the result is the same as from the source.
+        """
         return image
 
     @property
@@ -152,37 +173,51 @@ class Image(Rendition):
 
 
 class ResizedImage(Image):
-    def process(self, image):
-        image = super().process(image)
+    @property
+    def bounds(self):
+        return self.options
 
-        orig_width, orig_height = image.size
+    def get_size(self, source_size):
+        """Return the size of the rendition of a source of source_size."""
+        orig_width, orig_height = source_size
 
         max_width, max_height = self.options
 
         factor = min(max_width / orig_width, max_height / orig_height)
 
         if factor >= 1:
+            return source_size
+
+        return (int(orig_width * factor), int(orig_height * factor))
+
+    def process(self, image, source_size=None):
+        image = super().process(image, source_size)
+
+        size = self.get_size(source_size or image.size)
+
+        if size == image.size:
             return image
 
-        resized_image = image.resize(
-            (int(orig_width * factor), int(orig_height * factor)), PillowImage.LANCZOS
-        )
+        resized_image = image.resize(size, PillowImage.LANCZOS)
 
         return resized_image
 
 
 class EmbededPreviewImage(Image):
-    def render(self, input_buffer):
+    bounds = (80, 80)
+
+    # blurred, so not suitable for processing other renditions from
+    reusable = False
+
+    def render_image(self, processed_image):
         """Skip watermark for the blurred preview placeholder."""
         output_buffer = BytesIO()
 
-        with PillowImage.open(input_buffer) as image:
-            processed_image = self.process(image)
-            processed_image.save(output_buffer, format=self.format)
+        processed_image.save(output_buffer, format=self.format)
 
         return output_buffer
 
-    def process(self, image):
+    def process(self, image, source_size=None):
         preview_image = image.convert("RGB")
 
         preview_image.thumbnail((80, 80))
@@ -202,6 +237,85 @@ class EmbededPreviewImage(Image):
         return "data:image/webp;base64,%s" % self.encoded_preview.decode("ascii")
 
 
+def _fits_within(bounds, other_bounds):
+    if other_bounds is None:
+        return True
+    if bounds is None:
+        return False
+    return bounds[0] <= other_bounds[0] and bounds[1] <= other_bounds[1]
+
+
+def _get_area(bounds):
+    return float("inf") if bounds is None else bounds[0] * bounds[1]
+
+
+def _get_closest_image(processed_images, bounds):
+    """Return the smallest of the (bounds, image) pairs that bounds fits within."""
+    return min(
+        (pair for pair in processed_images if _fits_within(bounds, pair[0])),
+        key=lambda pair: _get_area(pair[0]),
+    )[1]
+
+
+def create_image_renditions(image_renditions, content=None):
+    """
+    Create image renditions of the same source, reading and decoding the
+    source only once. If the content of the source has already been read,
+    it can be given as content.
+
+    Renditions are created from large to small, each processed from the
+    smallest image processed so far that its bounds fit within (e.g.
+    l -> m -> s -> p) instead of from the full size image. Images are closed
+    as soon as no remaining rendition will be processed from them.
+    """
+    image_renditions = sorted(
+        image_renditions, key=lambda rendition: _get_area(rendition.bounds), reverse=True
+    )
+
+    if not image_renditions:
+        return
+
+    if content is None:
+        source = image_renditions[0].source
+        source.seek(0)
+        content = source.read()
+
+    with BytesIO(content) as input_buffer:
+        image = PillowImage.open(input_buffer)
+        image.load()
+
+        processed_images = [(None, image)]
+
+        # sizes are computed from the source, to not truncate them repeatedly
+        source_size = image.size
+
+        for index, rendition in enumerate(image_renditions):
+            source_image = _get_closest_image(processed_images, rendition.bounds)
+
+            processed_image = rendition.process(source_image, source_size)
+
+            rendition.create_from_image(processed_image)
+
+            if processed_image is not source_image:
+                if rendition.reusable:
+                    processed_images.append((rendition.bounds, processed_image))
+                else:
+                    processed_image.close()
+
+            needed_images = [
+                _get_closest_image(processed_images, remaining.bounds)
+                for remaining in image_renditions[index + 1 :]
+            ]
+
+            for pair in list(processed_images):
+                if not any(pair[1] is needed for needed in needed_images):
+                    pair[1].close()
+                    processed_images.remove(pair)
+
+        for _bounds, processed_image in processed_images:
+            processed_image.close()
+
+
 class Specification:
     def __init__(self, label, rendition, *options):
         if not issubclass(rendition, Rendition):
@@ -270,7 +384,90 @@ def get_registered_models():
 
 class ModelActionsMixin:
     def create_renditions(self):
+        self.render_renditions()
+        self.save(update_fields=["renditions", "renditions_fingerprint"])
+
+    def read_source(self):
+        """Return the content of the source file."""
+        self.file.open("rb")
+        self.file.seek(0)
+        return self.file.read()
+
+    def get_renditions_fingerprint(self, content):
+        """
+        Return a fingerprint of everything the renditions are created from,
+        i.e. the content of the source file, the specification (including
+        output formats) and the copyright stamp.
+        """
+        specification = self.get_renditions_specification()
+
+        digest = hashlib.sha256(content)
+
+        digest.update(
+            repr(
+                [
+                    (
+                        entry.label,
+                        entry.rendition.__name__,
+                        entry.options,
+                        getattr(entry.rendition, "format", None),
+                    )
+                    for entry in specification
+                ]
+            ).encode("utf8")
+        )
+
+        digest.update(
+            repr(
+                (
+                    self.attributes.get("copyright_stamp", ""),
+                    self.attributes.get("copyright_stamp_position") or "bottom-right",
+                )
+            ).encode("utf8")
+        )
+
+        return digest.hexdigest()
+
+    def has_current_renditions(self, content=None):
+        """
+        Return True if the renditions were created from the current source.
+        The content of the source is read unless it is given.
+        """
+        if not self.renditions_fingerprint:
+            return False
+
+        if content is None:
+            content = self.read_source()
+
+        return self.renditions_fingerprint == self.get_renditions_fingerprint(content)
+
+    def render_renditions(self, content=None):
+        """
+        Create the rendition files and set renditions, without saving.
+        The content of the source is read unless it is given.
+        """
+        specification = self.get_renditions_specification()
+
+        if content is None:
+            content = self.read_source()
+
         self.renditions = {}
+
+        renditions = [entry.to_rendition(self) for entry in specification]
+
+        create_image_renditions(
+            [rendition for rendition in renditions if isinstance(rendition, Image)],
+            content,
+        )
+
+        for rendition in renditions:
+            if not isinstance(rendition, Image):
+                rendition.create()
+            self.renditions[rendition.label] = rendition.to_dict()
+
+        self.renditions_fingerprint = self.get_renditions_fingerprint(content)
+
+    def get_renditions_specification(self):
         specification = Specification.get(self.__class__)
 
         if not specification:
@@ -286,12 +483,7 @@ class ModelActionsMixin:
                 "and that import order is correct."
             )
 
-        for entry in specification:
-            rendition = entry.to_rendition(self)
-            rendition.create()
-            self.renditions[rendition.label] = rendition.to_dict()
-
-        self.save(update_fields=["renditions"])
+        return specification
 
     def delete_renditions(self):
         specification = Specification.get(self.__class__)
@@ -301,4 +493,5 @@ class ModelActionsMixin:
             rendition.delete()
 
         self.renditions = {}
-        self.save(update_fields=["renditions"])
+        self.renditions_fingerprint = ""
+        self.save(update_fields=["renditions", "renditions_fingerprint"])
@@ -18,6 +18,20 @@ class MediaRenditionFileStorage(FileSystemStorage):
     pass
 
 
+class MediaUploadFileStorage(FileSystemStorage):
+    """Storage for uploads waiting to be processed, e.g. ZIP archives."""
+
+    @cached_property
+    def base_location(self):
+        return path.join(super().base_location, "uploads")
+
+    @cached_property
+    def base_url(self):
+        return super().base_url + "uploads/"
+
+
 default_origin_storage = MediaOriginFileStorage()
 
 default_rendition_storage = MediaRenditionFileStorage()
+
+default_upload_storage = MediaUploadFileStorage()
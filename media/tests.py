@@ -1,11 +1,24 @@
+import json
 import os
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
 
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.urls import reverse
+from django.utils import timezone
+from PIL import Image as PillowImage
 
-from media.models import Media
-from taxa.models import Taxon
+from core.views.generics import encode_cursor
+from media import models as media_models
+from media.models import Image, ImageLabelingImage, Media, RenditionJob, ZipUploadJob
+from media.storage import default_rendition_storage
+from synchronization.models import DataVersion
+from taxa.models import Taxon, TaxonClosure
 
 IN_GITHUB_ACTIONS = os.getenv("GITHUB_ACTIONS") == "true"
 
@@ -168,3 +181,640 @@ def test_fetch_prioritized_media_for_children(client):
     assert parent_media.slug not in retrieved_media_slugs
     assert child1_other_media.slug not in retrieved_media_slugs
     assert child2_other_media.slug not in retrieved_media_slugs
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_media_for_descendants(client):
+    # Given a user
+    user = get_user_model().objects.create(id=1)
+
+    # Given a genus with a species and a variety of the species
+    genus = Taxon.objects.create(id=1, slug="genus")
+    species = Taxon.objects.create(id=2, slug="species")
+    variety = Taxon.objects.create(id=3, slug="variety")
+    for depth, ancestor, descendant in (
+        (0, genus, genus),
+        (0, species, species),
+        (0, variety, variety),
+        (1, genus, species),
+        (1, species, variety),
+        (2, genus, variety),
+    ):
+        TaxonClosure.objects.create(ancestor=ancestor, descendant=descendant, depth=depth)
+
+    # Given an unrelated taxon
+    other_taxon = Taxon.objects.create(id=4, slug="other-taxon")
+
+    # Given media for all taxa with different priorities
+    Media.objects.create(slug="variety-media", taxon=variety, created_by=user, priority=0)
+    Media.objects.create(slug="species-media", taxon=species, created_by=user, priority=1)
+    Media.objects.create(slug="genus-media", taxon=genus, created_by=user, priority=1)
+    Media.objects.create(slug="other-media", taxon=other_taxon, created_by=user)
+
+    # When fetching media for the genus and its descendants
+    url = reverse("media-collection-view")
+    response = client.get(url, {"taxon": "genus", "descendants": "true"})
+    assert response.status_code == 200
+
+    # Then media for the whole subtree is returned by priority,
+    # with media for taxa closer to the genus first on ties
+    assert [media["slug"] for media in response.json()["media"]] == [
+        "variety-media",
+        "genus-media",
+        "species-media",
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_media_with_cursor(client):
+    # Given a user
+    user = get_user_model().objects.create(id=1)
+
+    # Given media where two were created at the same time
+    created_at = timezone.now()
+    for number in range(5):
+        Media.objects.create(
+            slug="media-%d" % number,
+            created_by=user,
+            created_at=created_at - timedelta(microseconds=number // 2),
+        )
+
+    # When walking the collection two media at a time
+    url = reverse("media-collection-view")
+    retrieved_slugs = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor, "limit": 2})
+        assert response.status_code == 200
+
+        retrieved_slugs += [media["slug"] for media in response.json()["media"]]
+        cursor = response.headers.get("X-Next-Cursor")
+
+    # Then all media is returned once, newest first
+    assert sorted(retrieved_slugs) == ["media-%d" % number for number in range(5)]
+    assert retrieved_slugs == list(
+        Media.objects.order_by("-created_at", "-id").values_list("slug", flat=True)
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_media_with_tampered_cursor(client):
+    url = reverse("media-collection-view")
+
+    # When paginating with well-formed cursors holding values of the wrong types
+    for values in (
+        ["x", 1],
+        [{"a": 1}, 1],
+        [timezone.now().isoformat(), "abc"],
+    ):
+        cursor = encode_cursor(values)
+        response = client.get(url, {"cursor": cursor, "limit": 2})
+
+        # Then the cursor is rejected
+        assert response.status_code == 400
+        assert response.json()["message"] == "The provided cursor is not valid."
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_with_primary_image(client):
+    # Given a user
+    user = get_user_model().objects.create(id=1)
+
+    # Given a taxon with an image labeling image and two other images
+    taxon = Taxon.objects.create(id=1, slug="taxon")
+    for slug, priority, attributes in (
+        ("labeling-image", 0, {"imagelabeling": True}),
+        ("first-image", 1, {}),
+        ("second-image", 2, {}),
+    ):
+        Media.objects.create(
+            slug=slug,
+            taxon=taxon,
+            created_by=user,
+            type="image/jpeg",
+            priority=priority,
+            attributes=attributes,
+            renditions={"s": {"url": slug}},
+        )
+
+    # When fetching taxa with images
+    url = reverse("taxon-collection")
+    response = client.get(url, {"fields": "slug,image"})
+
+    # Then the first image not used for image labeling is returned
+    assert response.json()["taxa"] == [
+        {"slug": "taxon", "image": {"s": {"url": "first-image"}}}
+    ]
+
+    # When the first image is removed
+    Media.objects.get(slug="first-image").delete()
+
+    # Then the next image takes its place
+    response = client.get(url, {"fields": "slug,image"})
+    assert response.json()["taxa"][0]["image"] == {"s": {"url": "second-image"}}
+
+    # When fetching illustrated taxa with their media counts
+    response = client.get(
+        url,
+        {
+            "fields": "slug,media_count,image_labeling_media_count",
+            "illustrated-only": "true",
+        },
+    )
+
+    # Then the remaining media are counted
+    assert response.json()["taxa"] == [
+        {"slug": "taxon", "media_count": 1, "image_labeling_media_count": 1}
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxon_media_count(client):
+    # Given a taxon, fetched once so that the response is cached
+    user = get_user_model().objects.create(id=1)
+    taxon = Taxon.objects.create(id=1, slug="taxon")
+    url = reverse("taxon", kwargs={"slug": "taxon"})
+    response = client.get(url, {"fields": "media_count"})
+    assert response.json() == {"media_count": 0}
+
+    # When media are added to the taxon
+    Media.objects.create(slug="media", taxon=taxon, created_by=user)
+
+    # Then the taxon is returned with the new media count
+    response = client.get(url, {"fields": "media_count"})
+    assert response.json() == {"media_count": 1}
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxon_media_count_in_batch(client):
+    # Given a taxon, fetched once in a batch so that the response is cached
+    user = get_user_model().objects.create(id=1)
+    taxon = Taxon.objects.create(id=1, slug="taxon")
+    url = reverse("taxon-batch")
+    response = client.get(url, {"slug": "taxon", "fields": "media_count"})
+    assert response.json() == {"taxa": {"taxon": {"media_count": 0}}}
+
+    # When media are added to the taxon
+    Media.objects.create(slug="media", taxon=taxon, created_by=user)
+
+    # Then the batch is returned with the new media count
+    response = client.get(url, {"slug": "taxon", "fields": "media_count"})
+    assert response.json() == {"taxa": {"taxon": {"media_count": 1}}}
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_import_media(tmp_path, monkeypatch):
+    # Given a taxon with media, and records of media for another taxon
+    user = get_user_model().objects.create(id=1, username="user")
+    old_taxon = Taxon.objects.create(id=1, slug="old-taxon")
+    new_taxon = Taxon.objects.create(id=2, slug="new-taxon")
+    Media.objects.create(slug="old-media", taxon=old_taxon, created_by=user)
+
+    records_path = tmp_path / "media.json"
+    records_path.write_text(
+        json.dumps(
+            [
+                {"slug": "media-%d" % number, "taxon": 2, "created_by": "user"}
+                for number in range(3)
+            ]
+        )
+    )
+
+    version = DataVersion.objects.get(name="taxon_media").version
+
+    refresh = media_models.refresh_taxon_media
+    refreshed_taxon_ids = []
+
+    def refresh_and_record(taxon_ids=None):
+        refreshed_taxon_ids.append(set(taxon_ids))
+        return refresh(taxon_ids)
+
+    monkeypatch.setattr(media_models, "refresh_taxon_media", refresh_and_record)
+
+    # When importing the records, clearing the existing media
+    call_command("importmedia", str(records_path), clear=True, stdout=StringIO())
+
+    # Then the taxa are refreshed, and the data version bumped, once
+    assert refreshed_taxon_ids == [{1, 2}]
+    assert DataVersion.objects.get(name="taxon_media").version == version + 1
+
+    old_taxon.refresh_from_db()
+    new_taxon.refresh_from_db()
+    assert (old_taxon.media_count, new_taxon.media_count) == (0, 3)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_delete_image_labeling_image():
+    # Given a taxon with an image labeling image
+    user = get_user_model().objects.create(id=1)
+    taxon = Taxon.objects.create(id=1, slug="taxon")
+    Media.objects.create(
+        slug="labeling-image",
+        taxon=taxon,
+        created_by=user,
+        type="image/jpeg",
+        attributes={"imagelabeling": True},
+    )
+    taxon.refresh_from_db()
+    assert taxon.image_labeling_media_count == 1
+    version = DataVersion.objects.get(name="taxon_media").version
+
+    # When the image is deleted through the image labeling model
+    ImageLabelingImage.objects.get(slug="labeling-image").delete()
+
+    # Then the taxon media are refreshed and the data version is bumped
+    taxon.refresh_from_db()
+    assert taxon.image_labeling_media_count == 0
+    assert DataVersion.objects.get(name="taxon_media").version > version
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_media_with_each_json_encoder(client, settings):
+    pytest.importorskip("orjson")
+
+    # Given media with a timestamp and non-ascii attributes
+    user = get_user_model().objects.create(id=1)
+    Media.objects.create(
+        slug="media",
+        created_by=user,
+        created_at=timezone.now(),
+        attributes={"title": "Växtplankton", "galleries": ["Öresund"]},
+    )
+
+    # When fetching media with each encoder
+    url = reverse("media-collection-view")
+    documents = []
+    for encoder in ("json", "orjson"):
+        settings.API_JSON_ENCODER = encoder
+        documents.append(client.get(url, {"stream": "false"}).json())
+        documents.append(
+            json.loads(b"".join(client.get(url, {"stream": "true"}).streaming_content))
+        )
+
+    # Then the documents are the same, with attributes passed through as stored
+    assert all(document == documents[0] for document in documents)
+    assert documents[0]["media"][0]["attributes"] == {
+        "title": "Växtplankton",
+        "galleries": ["Öresund"],
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_create_renditions_decoding_once(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    # Given an uploaded image with a copyright stamp
+    buffer = BytesIO()
+    PillowImage.new("RGB", (2000, 1500), (0, 128, 0)).save(buffer, format="PNG")
+
+    image = Image.objects.create(
+        slug="image",
+        type="image/png",
+        file=SimpleUploadedFile("image.png", buffer.getvalue()),
+        created_by=get_user_model().objects.create(id=1),
+        attributes={"copyright_stamp": "Nordic Microalgae"},
+    )
+
+    open_image = PillowImage.open
+    opened_images = []
+
+    def open_and_count(*args, **kwargs):
+        opened_images.append(args)
+        return open_image(*args, **kwargs)
+
+    monkeypatch.setattr(PillowImage, "open", open_and_count)
+
+    # When creating the renditions
+    image.create_renditions()
+
+    # Then the image is decoded once
+    assert len(opened_images) == 1
+
+    # Then each rendition has its own size
+    sizes = {}
+    for label in ("o", "l", "m", "s"):
+        path = default_rendition_storage.path("%s/%s" % (label, image.file.name))
+        with open_image(os.path.splitext(path)[0] + ".webp") as rendition:
+            sizes[label] = rendition.size
+    assert sizes == {
+        "o": (2000, 1500),
+        "l": (1024, 768),
+        "m": (480, 360),
+        "s": (240, 180),
+    }
+    assert image.renditions["p"]["url"].startswith("data:image/webp;base64,")
+
+    # Then the fingerprint is stored outside of the renditions served by the API
+    image.refresh_from_db()
+    assert set(image.renditions) == {"o", "p", "s", "m", "l"}
+    assert image.has_current_renditions()
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_create_renditions_sized_from_source(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    # Given an uploaded image that does not scale down to whole pixels
+    buffer = BytesIO()
+    PillowImage.new("RGB", (3000, 2000)).save(buffer, format="PNG")
+
+    image = Image.objects.create(
+        slug="image",
+        type="image/png",
+        file=SimpleUploadedFile("image.png", buffer.getvalue()),
+        created_by=get_user_model().objects.create(id=1),
+    )
+
+    # When creating the renditions
+    image.create_renditions()
+
+    # Then each rendition has the size it would have if resized from the source
+    sizes = {}
+    for label in ("l", "m", "s"):
+        path = default_rendition_storage.path("%s/%s" % (label, image.file.name))
+        with PillowImage.open(os.path.splitext(path)[0] + ".webp") as rendition:
+            sizes[label] = rendition.size
+    assert sizes == {"l": (1024, 682), "m": (480, 320), "s": (240, 160)}
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_create_renditions_in_workers(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    # Given some uploaded images and one upload that is not an image
+    user = get_user_model().objects.create(id=1)
+
+    for number in range(3):
+        buffer = BytesIO()
+        PillowImage.new("RGB", (300, 200)).save(buffer, format="PNG")
+        Image.objects.create(
+            slug="image-%d" % number,
+            type="image/png",
+            file=SimpleUploadedFile("image.png", buffer.getvalue()),
+            created_by=user,
+        )
+
+    broken_image = Image.objects.create(
+        slug="broken",
+        type="image/png",
+        file=SimpleUploadedFile("broken.png", b"not an image"),
+        created_by=user,
+    )
+
+    # When creating renditions in two worker processes
+    stdout, stderr = StringIO(), StringIO()
+    with pytest.raises(CommandError, match="Failed to process 1 objects"):
+        call_command(
+            "createrenditions",
+            "image",
+            workers=2,
+            checkpoint=str(tmp_path / "checkpoint"),
+            stdout=stdout,
+            stderr=stderr,
+        )
+
+    # Then the failure is reported without stopping the others
+    assert "with id %s" % broken_image.pk in stderr.getvalue()
+    assert "Successfully processed 3 objects" in stdout.getvalue()
+
+    # Then the renditions are saved
+    for image in Image.objects.exclude(pk=broken_image.pk):
+        assert set(image.renditions) == {"o", "p", "s", "m", "l"}
+        assert image.renditions_fingerprint
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_create_renditions_incrementally(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    checkpoint_path = tmp_path / "checkpoint"
+
+    # Given some uploaded images
+    user = get_user_model().objects.create(id=1)
+
+    images = []
+    for number in range(3):
+        buffer = BytesIO()
+        PillowImage.new("RGB", (300, 200)).save(buffer, format="PNG")
+        images.append(
+            Image.objects.create(
+                slug="image-%d" % number,
+                type="image/png",
+                file=SimpleUploadedFile("image.png", buffer.getvalue()),
+                created_by=user,
+            )
+        )
+
+    def create_renditions():
+        stdout = StringIO()
+        call_command(
+            "createrenditions", "image", checkpoint=str(checkpoint_path), stdout=stdout
+        )
+        return stdout.getvalue()
+
+    # When a previous run was interrupted after the first image
+    checkpoint_path.write_text(json.dumps({"media.image": images[0].pk}))
+    output = create_renditions()
+
+    # Then it is resumed with the remaining images, and the checkpoint removed
+    assert "Successfully processed 2 objects, 0 were already up to date." in output
+    assert not checkpoint_path.exists()
+
+    # When creating renditions again
+    output = create_renditions()
+
+    # Then only the image without renditions is processed
+    assert "Successfully processed 1 objects, 2 were already up to date." in output
+
+    # When a copyright stamp has been added to an image
+    Image.objects.filter(pk=images[1].pk).update(
+        attributes={"copyright_stamp": "Nordic Microalgae"}
+    )
+    output = create_renditions()
+
+    # Then only that image is processed
+    assert "Successfully processed 1 objects, 2 were already up to date." in output
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_run_rendition_jobs(settings, tmp_path, monkeypatch):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    monkeypatch.setattr(RenditionJob, "max_attempts", 2)
+
+    # Given queued jobs for an uploaded image and an upload that is not an image
+    user = get_user_model().objects.create(id=1)
+
+    buffer = BytesIO()
+    PillowImage.new("RGB", (300, 200)).save(buffer, format="PNG")
+    image = Image.objects.create(
+        slug="image",
+        type="image/png",
+        file=SimpleUploadedFile("image.png", buffer.getvalue()),
+        created_by=user,
+    )
+    broken_image = Image.objects.create(
+        slug="broken",
+        type="image/png",
+        file=SimpleUploadedFile("broken.png", b"not an image"),
+        created_by=user,
+    )
+
+    job = RenditionJob.objects.enqueue(image)
+    broken_job = RenditionJob.objects.enqueue(broken_image)
+
+    # Then each media is only queued once
+    assert RenditionJob.objects.enqueue(image) == job
+
+    # When running the jobs
+    call_command("runmediajobs", once=True, stdout=StringIO(), stderr=StringIO())
+
+    # Then the renditions of the image are created
+    job.refresh_from_db()
+    assert job.status == RenditionJob.Status.DONE
+    image.refresh_from_db()
+    assert "s" in image.renditions
+
+    # Then the failed job is queued to be retried later
+    broken_job.refresh_from_db()
+    assert broken_job.status == RenditionJob.Status.QUEUED
+    assert broken_job.attempts == 1
+    assert broken_job.run_after > timezone.now()
+
+    # When running the jobs again, when the retry is due
+    RenditionJob.objects.filter(pk=broken_job.pk).update(run_after=timezone.now())
+    call_command("runmediajobs", once=True, stdout=StringIO(), stderr=StringIO())
+
+    # Then the job has failed for good
+    broken_job.refresh_from_db()
+    assert broken_job.status == RenditionJob.Status.FAILED
+    assert broken_job.error
+
+    # Given jobs left running by a stopped worker, one with attempts left
+    stale_job = RenditionJob.objects.create(media=image, attempts=1)
+    exhausted_job = RenditionJob.objects.create(media=broken_image, attempts=2)
+    RenditionJob.objects.filter(pk__in=[stale_job.pk, exhausted_job.pk]).update(
+        status=RenditionJob.Status.RUNNING, updated_at=timezone.now() - timedelta(days=1)
+    )
+
+    # When queueing stale jobs again
+    assert RenditionJob.objects.requeue_stale(timezone.now()) == (1, 1)
+
+    # Then only the job with attempts left is queued, the other has failed
+    stale_job.refresh_from_db()
+    assert stale_job.status == RenditionJob.Status.QUEUED
+    exhausted_job.refresh_from_db()
+    assert exhausted_job.status == RenditionJob.Status.FAILED
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_run_zip_upload_job(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    # Given an uploaded ZIP archive with two images, a broken image and other files
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name in ("cells/b.png", "cells/a.png"):
+            image_buffer = BytesIO()
+            PillowImage.new("RGB", (300, 200)).save(image_buffer, format="PNG")
+            archive.writestr(name, image_buffer.getvalue())
+        archive.writestr("cells/broken.png", b"not an image")
+        archive.writestr("__MACOSX/cells/._a.png", b"")
+        archive.writestr("readme.txt", b"")
+
+    taxon = Taxon.objects.create(id=1, slug="taxon")
+
+    job = ZipUploadJob(
+        filename="cells.zip",
+        taxon=taxon,
+        slug_prefix="taxon",
+        attributes={"title": "Cells", "imagelabeling": True},
+        created_by=get_user_model().objects.create(id=1),
+    )
+    job.file.save("cells.zip", SimpleUploadedFile("cells.zip", buffer.getvalue()))
+
+    # When running the queued jobs
+    call_command("runmediajobs", once=True, stdout=StringIO(), stderr=StringIO())
+
+    # Then the result of each image entry is reported
+    job.refresh_from_db()
+    assert job.status == ZipUploadJob.Status.DONE
+    assert job.entry_count == 3
+    results = {result.pop("entry"): result for result in job.results}
+    assert results["cells/a.png"] == {"slug": "taxon-1"}
+    assert results["cells/b.png"] == {"slug": "taxon-2"}
+    assert "error" in results["cells/broken.png"]
+
+    # Then the images are created with their renditions and own priorities
+    images = ImageLabelingImage.objects.filter(taxon=taxon).order_by("slug")
+    assert [image.attributes["title"] for image in images] == ["Cells", "Cells"]
+    assert [image.priority for image in images] == [0, 1]
+    assert all("s" in image.renditions for image in images)
+
+    # Then the media of the taxon are refreshed
+    taxon.refresh_from_db()
+    assert taxon.image_labeling_media_count == 2
+
+    # Then the archive is removed
+    assert not job.file
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_run_invalid_zip_upload_jobs(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+
+    user = get_user_model().objects.create(id=1)
+
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("readme.txt", b"")
+
+    for content, error in (
+        (b"not a zip file", "ValueError: Invalid ZIP file"),
+        (buffer.getvalue(), "ValueError: No valid image files found in ZIP"),
+    ):
+        # Given an uploaded archive that is broken or has no images
+        job = ZipUploadJob(filename="upload.zip", slug_prefix="upload", created_by=user)
+        job.file.save("upload.zip", SimpleUploadedFile("upload.zip", content))
+        job.attempts = 1
+
+        # When running the job without retrying, as in the admin
+        job.run(retry=False)
+
+        # Then it has failed at the first attempt
+        job.refresh_from_db()
+        assert job.status == ZipUploadJob.Status.FAILED
+        assert job.error == error
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_check_indexes():
+    # When checking which API filters are backed by indexes
+    out = StringIO()
+    call_command("checkindexes", stdout=out)
+    lines = dict(line.split(": ", 1) for line in out.getvalue().splitlines()[:-1])
+
+    # Then the image labeling view itself is backed by an index
+    assert lines["/api/media/image_labeling/?"].startswith("index-backed")
+
+    # Then the index used by the media view is not attributed to its filters
+    assert (
+        "taxon_media_imagelabeling_idx" not in lines["/api/media/?artist=Marie Johansen"]
+    )
@@ -1,9 +1,10 @@
 from typing import ClassVar
 
 from django.db.models import Count, F, OuterRef, Q, Subquery
-from django.http import Http404, JsonResponse
+from django.http import Http404
 
-from core.views.generics import ClientError, CollectionView
+from core.views.encoding import JSONResponse
+from core.views.generics import ClientError, CollectionView, data_version_condition
 from media.models import Image, InvalidTagset, Media
 from taxa.models import RelatedTaxon, Taxon
 
@@ -27,6 +28,10 @@ class MediaCollectionView(CollectionView):
 
     plural_key = "media"
 
+    cursor_fields = ("-created_at", "-id")
+
+    data_versions = ("taxon", "taxon_media")
+
     def get_fields(self, *args, **kwargs):
         fields, expressions = super().get_fields(*args, **kwargs)
 
@@ -36,6 +41,45 @@ class MediaCollectionView(CollectionView):
 
         return fields, expressions
 
+    def is_descendants_mode(self):
+        return self.request.GET.get("descendants", "").lower() == "true"
+
+    def filter_by_taxon(self, queryset, taxon):
+        children = self.request.GET.get("children", "").lower() == "true"
+
+        if self.is_descendants_mode():
+            if children:
+                raise ClientError(
+                    "It is not possible to combine children and descendants."
+                )
+
+            # media for the whole subtree, including the taxon itself
+            return queryset.filter(taxon__ancestor_links__ancestor__slug=taxon)
+
+        if children:
+            possible_taxons = [
+                child["slug"]
+                for child in Taxon.objects.filter(slug=taxon)
+                .values_list("children", flat=True)
+                .first()
+                or []
+                if "slug" in child
+            ]
+        else:
+            possible_taxons = [taxon]
+
+        return queryset.filter(taxon__slug__in=possible_taxons)
+
+    def get_ordering(self, taxon):
+        if not taxon:
+            return ("-created_at",)
+
+        if self.is_descendants_mode():
+            # by priority, taxa closer to the requested one first on ties
+            return ("priority", "taxon__ancestor_links__depth", "id")
+
+        return ("priority",)
+
     def get_queryset(self, *args, **kwargs):
         model_type = self.request.GET.get("type", "all")
 
@@ -90,19 +134,7 @@ class MediaCollectionView(CollectionView):
         taxon = self.request.GET.get("taxon", "")
 
         if taxon:
-            if self.request.GET.get("children", "").lower() == "true":
-                possible_taxons = [
-                    child["slug"]
-                    for child in Taxon.objects.filter(slug=taxon)
-                    .values_list("children", flat=True)
-                    .first()
-                    or []
-                    if "slug" in child
-                ]
-            else:
-                possible_taxons = [taxon]
-
-            queryset = queryset.filter(taxon__slug__in=possible_taxons)
+            queryset = self.filter_by_taxon(queryset, taxon)
 
         if self.request.GET.get("priority", "").lower() == "true":
             prioritized_media = (
@@ -112,7 +144,7 @@ class MediaCollectionView(CollectionView):
             )
             queryset = queryset.filter(id__in=Subquery(prioritized_media))
         else:
-            queryset = queryset.order_by("priority" if taxon else "-created_at")
+            queryset = queryset.order_by(*self.get_ordering(taxon))
 
         return queryset
 
@@ -127,6 +159,8 @@ class ArtistCollectionView(CollectionView):
 
     plural_key = "artists"
 
+    data_versions = ("taxon_media",)
+
     def get_queryset(self, *args, **kwargs):
         queryset = super().get_queryset(*args, **kwargs)
 
@@ -145,6 +179,8 @@ class TagCollectionView(CollectionView):
     fields = ("name",)
     plural_key = "tags"
 
+    data_versions = ("taxon_media",)
+
     def get_queryset(self, *args, **kwargs):
         try:
             queryset = Media.objects.get_tagset(
@@ -201,19 +237,7 @@ class ImageLabelingCollectionView(MediaCollectionView):
 
         taxon = self.request.GET.get("taxon", "")
         if taxon:
-            if self.request.GET.get("children", "").lower() == "true":
-                possible_taxons = [
-                    child["slug"]
-                    for child in Taxon.objects.filter(slug=taxon)
-                    .values_list("children", flat=True)
-                    .first()
-                    or []
-                    if "slug" in child
-                ]
-            else:
-                possible_taxons = [taxon]
-
-            queryset = queryset.filter(taxon__slug__in=possible_taxons)
+            queryset = self.filter_by_taxon(queryset, taxon)
 
         if self.request.GET.get("priority", "").lower() == "true":
             prioritized_media = (
@@ -223,7 +247,7 @@ class ImageLabelingCollectionView(MediaCollectionView):
             )
             queryset = queryset.filter(id__in=Subquery(prioritized_media))
         else:
-            queryset = queryset.order_by("priority" if taxon else "-created_at")
+            queryset = queryset.order_by(*self.get_ordering(taxon))
 
         # Only include images flagged for ImageLabeling
         queryset = queryset.filter(attributes__imagelabeling=True)
@@ -231,6 +255,7 @@ class ImageLabelingCollectionView(MediaCollectionView):
         return queryset
 
 
+@data_version_condition("taxon", "taxon_media")
 def image_labeling_summary(request):
     """Return aggregated filter data for image labeling without fetching all images"""
 
@@ -330,7 +355,7 @@ def image_labeling_summary(request):
         for name, count in sorted(all_geographic_areas.items())
     ]
 
-    return JsonResponse(
+    return JSONResponse(
         {
             "taxa": taxa_list,
             "instruments": instruments_list,
@@ -341,13 +366,9 @@ def image_labeling_summary(request):
     )
 
 
+@data_version_condition("taxon", "taxon_media")
 def image_labeling_grouped_by_plankton(request):
     """Return taxa grouped by plankton groups with unique class names per taxon."""
-    from taxa.models import get_filter_config
-
-    # Load the groups config
-    config = get_filter_config()
-    groups_config = config.get("groups_of_organisms", [])
 
     # Define the display order (excluding "Other microalgae" - those go to "Other")
     group_order = [
@@ -358,13 +379,6 @@ def image_labeling_grouped_by_plankton(request):
         "Protozoa",
     ]
 
-    # Build a lookup: group_name -> set of parent taxa scientific names
-    # Only include groups that are in our display order
-    groups_parents = {}
-    for group in groups_config:
-        if group["group_name"] in group_order:
-            groups_parents[group["group_name"]] = set(group["included_taxa"])
-
     # Get all image labeling images with taxa
     images = (
         Image.objects.filter(attributes__imagelabeling=True)
@@ -372,7 +386,7 @@ def image_labeling_grouped_by_plankton(request):
         .only("taxon", "attributes")
     )
 
-    # Build data structure: { taxon_slug: { taxon_name, classification, titles } }
+    # Build data structure: { taxon_slug: { taxon_name, groups, titles } }
     taxa_data = {}
     for img in images:
         if not img.taxon:
@@ -385,27 +399,18 @@ def image_labeling_grouped_by_plankton(request):
             taxa_data[taxon_slug] = {
                 "taxon_slug": taxon_slug,
                 "taxon_name": img.taxon.scientific_name,
-                "classification": img.taxon.classification or [],
+                "groups": img.taxon.groups,
                 "titles": set(),
             }
         taxa_data[taxon_slug]["titles"].add(title)
 
-    # Determine which group each taxon belongs to
-    def get_taxon_group(taxon_name, classification):
-        """Check which group a taxon belongs to based on its name or classification"""
-        # Build set of names to check: the taxon's own name + all ancestors
-        classification_names = {
-            c.get("scientific_name") for c in classification if isinstance(c, dict)
-        }
-        # Also include the taxon's own scientific name
-        names_to_check = classification_names | {taxon_name}
-
+    # Determine which group each taxon belongs to, using the groups
+    # of organisms stored for each taxon by importtaxa
+    def get_taxon_group(groups):
+        """Return the first group in display order that a taxon belongs to"""
         for group_name in group_order:
-            if group_name in groups_parents:
-                parents = groups_parents[group_name]
-                # Check if any of the taxon's names match the group's included taxa
-                if names_to_check & parents:
-                    return group_name
+            if group_name in groups:
+                return group_name
         return None
 
     # Organize taxa by groups
@@ -413,7 +418,7 @@ def image_labeling_grouped_by_plankton(request):
     unassigned_taxa = []
 
     for taxon_slug, data in taxa_data.items():
-        group = get_taxon_group(data["taxon_name"], data["classification"])
+        group = get_taxon_group(data["groups"])
         taxon_entry = {
             "taxon_slug": data["taxon_slug"],
             "taxon_name": data["taxon_name"],
@@ -453,9 +458,10 @@ def image_labeling_grouped_by_plankton(request):
             }
         )
 
-    return JsonResponse({"groups": result})
+    return JSONResponse({"groups": result})
 
 
+@data_version_condition("taxon", "taxon_media")
 def image_labeling_first_per_taxon(request):
     """Return first image (by priority) per taxon for landing page"""
     from django.db.models import Case, IntegerField, Min, Value, When
@@ -511,4 +517,4 @@ def image_labeling_first_per_taxon(request):
         }
         results.append(result)
 
-    return JsonResponse({"images": results})
+    return JSONResponse({"images": results})
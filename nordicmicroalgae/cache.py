@@ -0,0 +1,48 @@
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+# Sizes of the stored values, keyed by cache name like the stores of LocMemCache
+_sizes = {}
+
+
+class BoundedLocMemCache(LocMemCache):
+    """
+    In-memory cache bounded by the total size of its values as well as by the
+    number of entries. The MAX_SIZE option is the budget in bytes (of pickled
+    values). The least recently used entries are evicted first when a new
+    value does not fit, and values larger than the budget are not stored.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self._max_size = int(params.get("OPTIONS", {}).get("MAX_SIZE", 64 * 1024 * 1024))
+        self._sizes = _sizes.setdefault(name, {})
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        self._delete(key)
+
+        size = len(value)
+        if size > self._max_size:
+            return
+
+        total_size = sum(self._sizes.values())
+        while self._cache and (
+            len(self._cache) >= self._max_entries or total_size + size > self._max_size
+        ):
+            # the least recently used entry is last
+            evicted_key, _ = self._cache.popitem()
+            del self._expire_info[evicted_key]
+            total_size -= self._sizes.pop(evicted_key, 0)
+
+        super()._set(key, value, timeout)
+        self._sizes[key] = size
+
+    def _delete(self, key):
+        self._sizes.pop(key, None)
+        return super()._delete(key)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._sizes.clear()
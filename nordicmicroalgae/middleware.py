@@ -1,8 +1,24 @@
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
 class CorsMiddleware:
     enabled_paths = ("/api/",)
 
     exposed_headers = (
         "X-Total",  # custom header used in REST API
+        "X-Total-Estimate",  # custom header used in REST API
+        "X-Next-Cursor",  # custom header used in REST API
+        "ETag",  # used for conditional requests
     )
 
     def __init__(self, get_response):
@@ -18,3 +34,122 @@ class CorsMiddleware:
             response["Access-Control-Expose-Headers"] = ", ".join(self.exposed_headers)
 
         return response
+
+
+class CompressionMiddleware:
+    """
+    Compress responses from the REST API with brotli (when installed) or gzip.
+
+    Responses with an ETag are compressed once and the compressed content is
+    stored in the "api" cache, so later requests for the same data are served
+    without compressing again.
+    """
+
+    enabled_paths = ("/api/",)
+
+    cache_alias = "api"
+
+    # Responses smaller than this (in bytes) are not worth compressing
+    minimum_size = 200
+
+    # Quality for content that is stored in the cache versus compressed on
+    # every request (brotli only; gzip always uses its default level)
+    cached_brotli_quality = 11
+    brotli_quality = 5
+
+    re_accepts_gzip = re.compile(r"\bgzip\b")
+    re_accepts_brotli = re.compile(r"\bbr\b")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if not any(request.path_info.startswith(path) for path in self.enabled_paths):
+            return response
+
+        if response.has_header("Content-Encoding") or response.status_code == 304:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = self.get_encoding(request, streaming=response.streaming)
+
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response["Content-Length"]
+        else:
+            if len(response.content) < self.minimum_size:
+                return response
+
+            content = self.get_compressed_content(response, encoding)
+
+            if content is None:
+                return response
+
+            response.content = content
+            response["Content-Length"] = str(len(content))
+
+        # the compressed representation is not byte-for-byte equal to the
+        # one identified by a strong ETag (see also Django's GZipMiddleware)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+
+        response["Content-Encoding"] = encoding
+
+        return response
+
+    def get_encoding(self, request, streaming=False):
+        accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+        if (
+            brotli is not None
+            and not streaming
+            and self.re_accepts_brotli.search(accept_encoding)
+        ):
+            return "br"
+        if self.re_accepts_gzip.search(accept_encoding):
+            return "gzip"
+        return None
+
+    def compress(self, content, encoding, cached=False):
+        if encoding == "br":
+            return brotli.compress(
+                content,
+                quality=self.cached_brotli_quality if cached else self.brotli_quality,
+            )
+        return compress_string(content)
+
+    def get_compressed_content(self, response, encoding):
+        """
+        Return the compressed content of response, or None if compressing
+        does not make it smaller.
+        """
+        etag = response.get("ETag")
+
+        if response.status_code != 200 or not etag:
+            content = self.compress(response.content, encoding)
+            return content if len(content) < len(response.content) else None
+
+        cache = caches[self.cache_alias]
+        key = "compressed:%s:%s" % (encoding, etag)
+
+        content = cache.get(key)
+
+        if content is None:
+            content = self.compress(response.content, encoding, cached=True)
+
+            if len(content) >= len(response.content):
+                # store it anyway, so that the next request is not compressed
+                # only to be thrown away again
+                content = b""
+
+            if len(content) <= settings.API_CACHE_MAX_ENTRY_SIZE:
+                cache.set(key, content, timeout=None)
+
+        return content or None
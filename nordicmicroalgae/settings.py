@@ -68,10 +68,12 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
 ]
 
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "nordicmicroalgae.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -126,6 +128,77 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# The "api" cache holds precomputed REST API responses for the taxonomy
+# endpoints, and their compressed copies. Use "locmem" for a per-process LRU
+# cache bounded by MAX_SIZE (in bytes) or "file" for a cache shared between
+# processes on the same host. The file backend is not LRU: once MAX_ENTRIES is
+# reached it removes a third of the entries at random, and it can use up to
+# MAX_ENTRIES * API_CACHE_MAX_ENTRY_SIZE bytes of disk.
+
+API_CACHE_BACKENDS = {
+    "locmem": "nordicmicroalgae.cache.BoundedLocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+}
+
+API_CACHE_BACKEND = os.environ.get(
+    "DJANGO_API_CACHE_BACKEND", config.get("api_cache_backend", "locmem")
+)
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "api": {
+        "BACKEND": API_CACHE_BACKENDS[API_CACHE_BACKEND],
+        "LOCATION": os.environ.get(
+            "DJANGO_API_CACHE_LOCATION",
+            config.get("api_cache_location", os.path.join(DATA_DIR, "cache", "api")),
+        ),
+        "OPTIONS": {
+            "MAX_ENTRIES": int(
+                os.environ.get(
+                    "DJANGO_API_CACHE_MAX_ENTRIES",
+                    config.get("api_cache_max_entries", 1000),
+                )
+            ),
+            "MAX_SIZE": int(
+                os.environ.get(
+                    "DJANGO_API_CACHE_MAX_SIZE",
+                    config.get("api_cache_max_size", 64 * 1024 * 1024),
+                )
+            ),
+        },
+    },
+}
+
+# Responses larger than this (in bytes) are never stored in the "api" cache
+API_CACHE_MAX_ENTRY_SIZE = int(
+    os.environ.get(
+        "DJANGO_API_CACHE_MAX_ENTRY_SIZE",
+        config.get("api_cache_max_entry_size", 5 * 1024 * 1024),
+    )
+)
+
+
+# Encoder used for API responses: "auto" uses orjson when it is installed,
+# "json" always uses the standard library
+API_JSON_ENCODER = os.environ.get(
+    "DJANGO_API_JSON_ENCODER", config.get("api_json_encoder", "auto")
+)
+
+
+# Whether renditions of media uploaded in the admin, and images in uploaded
+# ZIP archives, are created in the background by the runmediajobs command,
+# instead of in the request. Requires a runmediajobs worker to be running.
+MEDIA_RENDITIONS_IN_BACKGROUND = os.environ.get(
+    "DJANGO_MEDIA_RENDITIONS_IN_BACKGROUND",
+    str(config.get("media_renditions_in_background", "no")),
+).lower() in ["yes", "on", "true"]
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
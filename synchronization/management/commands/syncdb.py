@@ -4,6 +4,8 @@ from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.db import transaction
 
+from synchronization.models import DATASET_GENERATION, DataVersion
+
 
 class Command(BaseCommand):
     help = "Synchronize database with content repo"
@@ -61,4 +63,6 @@ class Command(BaseCommand):
             call_command("importmedia", media_file.name, clear=True, **options)
             self.write("")
 
+            DataVersion.objects.bump(DATASET_GENERATION)
+
         self.write("Synchronization job completed.")
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_data_versions(apps, schema_editor):
+    """Start versioning the tables served by the REST API"""
+    DataVersion = apps.get_model("synchronization", "DataVersion")
+
+    for name in ("taxon", "taxon_synonym", "taxon_facts", "taxon_media"):
+        DataVersion.objects.get_or_create(name=name)
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("version", models.PositiveBigIntegerField(default=1)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "db_table": "data_version",
+            },
+        ),
+        migrations.RunPython(create_data_versions, migrations.RunPython.noop),
+    ]
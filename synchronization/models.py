@@ -1 +1,48 @@
-# Create your models here.
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+# Pseudo table name for the generation of the whole dataset, bumped by syncdb
+DATASET_GENERATION = "dataset"
+
+
+class DataVersionManager(models.Manager):
+    def bump(self, *names):
+        """Increment the version for each of the given tables."""
+        now = timezone.now()
+
+        for name in names:
+            updated = self.filter(name=name).update(
+                version=F("version") + 1, updated_at=now
+            )
+            if not updated:
+                self.get_or_create(name=name, defaults={"updated_at": now})
+
+    def get_state(self, *names):
+        """Return a (versions, last modified) pair for the given tables."""
+        rows = self.filter(name__in=names).order_by("name")
+        rows = list(rows.values_list("name", "version", "updated_at"))
+
+        versions = [(name, version) for name, version, _updated_at in rows]
+        last_modified = max((updated_at for *_, updated_at in rows), default=None)
+
+        return versions, last_modified
+
+
+class DataVersion(models.Model):
+    """
+    Version counter for a database table, bumped every time its content
+    changes. Used to answer conditional requests in the REST API.
+    """
+
+    name = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=1)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    objects = DataVersionManager()
+
+    class Meta:
+        db_table = "data_version"
+
+    def __str__(self):
+        return "%s (version %u)" % (self.name, self.version)
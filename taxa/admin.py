@@ -3,13 +3,31 @@ from typing import ClassVar
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import ImageLabelingTaxonDescription, OrphanedDescription
+from synchronization.models import DataVersion
+
+from .models import ImageLabelingTaxonDescription, OrphanedDescription, TaxonQuerySet
+
+
+class GroupListFilter(admin.SimpleListFilter):
+    title = "group of organisms"
+    parameter_name = "group"
+
+    def lookups(self, request, model_admin):
+        return [
+            (group["group_name"], group["group_name"])
+            for group in TaxonQuerySet.filter_config["groups_of_organisms"]
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value() is not None:
+            queryset = queryset.filter(groups__contains=[self.value()])
+        return queryset
 
 
 @admin.register(ImageLabelingTaxonDescription)
 class ImageLabelingTaxonDescriptionAdmin(admin.ModelAdmin):
     list_display = ("scientific_name", "rank", "has_description", "has_images")  # UPDATED
-    list_filter = ("rank",)
+    list_filter = ("rank", GroupListFilter)
     search_fields = ("scientific_name", "slug")
 
     fields = ("taxon_info", "image_labeling_description")
@@ -47,6 +65,10 @@ class ImageLabelingTaxonDescriptionAdmin(admin.ModelAdmin):
     has_images.boolean = True
     has_images.short_description = "Has Images"
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        DataVersion.objects.bump(obj._meta.db_table)
+
     def has_add_permission(self, request):
         return False  # Can only edit existing taxa
 
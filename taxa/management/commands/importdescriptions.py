@@ -2,6 +2,7 @@ import json
 
 from django.core.management.base import BaseCommand
 
+from synchronization.models import DataVersion
 from taxa.models import OrphanedDescription, Taxon
 
 
@@ -62,6 +63,8 @@ class Command(BaseCommand):
                         )
                     )
 
+        DataVersion.objects.bump(Taxon._meta.db_table)
+
         if verbosity > 0:
             self.stdout.write(
                 self.style.SUCCESS(
@@ -5,6 +5,7 @@ from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from synchronization.models import DataVersion
 from taxa.models import Synonym, Taxon
 
 DEFAULT_SYNONYMS_FILE = os.path.join(settings.CONTENT_DIR, "species", "synonyms.txt")
@@ -128,6 +129,8 @@ class Command(BaseCommand):
                 for object_to_save in objects_to_save:
                     object_to_save.save()
                     number_of_saved_objects = number_of_saved_objects + 1
+
+                DataVersion.objects.bump(Synonym._meta.db_table)
         except Exception as e:
             raise CommandError(
                 "Failed to write to database. Import aborted. Error was: %s" % e
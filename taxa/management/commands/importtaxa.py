@@ -8,7 +8,13 @@ from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 from django.utils.text import slugify
 
-from taxa.models import Taxon
+from synchronization.models import DataVersion
+from taxa.models import (
+    Taxon,
+    TaxonClosure,
+    get_groups_of_organisms,
+    refresh_descendant_counts,
+)
 
 DEFAULT_TAXA_FILE = os.path.join(settings.CONTENT_DIR, "species", "taxa.txt")
 
@@ -114,6 +120,9 @@ class Command(BaseCommand):
 
         taxa_by_id = {}
 
+        # Ids of all ancestors for each taxon, starting with the parent
+        ancestor_ids_by_id = {}
+
         if clear_existing_objects:
             preexisting_slugs = []
         else:
@@ -137,12 +146,15 @@ class Command(BaseCommand):
                     "parent": {},
                     "classification": [],
                     "children": [],
+                    "groups": [],
                 }
                 for row in rows
             }
 
             # Build up hierachial data for each taxon
             for taxon_info in taxa_by_id.values():
+                ancestor_ids = ancestor_ids_by_id[taxon_info["id"]] = []
+
                 if taxon_info["parent_id"] is None:
                     if verbosity > 1:
                         self.stdout.write(
@@ -181,6 +193,8 @@ class Command(BaseCommand):
                             "rank": parent_info["rank"],
                         }
                     ] + taxon_info["classification"]
+                    if parent_info["id"] != taxon_info["id"]:
+                        ancestor_ids.append(parent_info["id"])
 
                     # Special insertae sedis cases, break the loop
                     if parent_info["parent_id"] == parent_info["id"]:
@@ -204,9 +218,17 @@ class Command(BaseCommand):
                     # Move up to next parent
                     parent_info = taxa_by_id.get(parent_info["parent_id"])
 
+            # Add groups of organisms, once the classification is complete
+            for taxon_info in taxa_by_id.values():
+                taxon_info["groups"] = get_groups_of_organisms(
+                    taxon_info["scientific_name"], taxon_info["classification"]
+                )
+
         # Part 2: Create models and write in one atomic operation.
         number_of_saved_objects = 0
 
+        saved_ids = {}
+
         try:
             with transaction.atomic(savepoint=False):
                 if clear_existing_objects:
@@ -218,7 +240,7 @@ class Command(BaseCommand):
                     try:
                         taxon.full_clean(
                             # safe-to-exclude components built for convenience
-                            exclude=["classification", "children", "parent"]
+                            exclude=["classification", "children", "parent", "groups"]
                         )
                     except ValidationError as e:
                         validation_messages = ", ".join(
@@ -242,6 +264,30 @@ class Command(BaseCommand):
 
                     taxon.save(force_insert=True)
                     number_of_saved_objects = number_of_saved_objects + 1
+
+                    saved_ids[taxon_info["id"]] = taxon.id
+
+                # Index the hierarchy of the saved taxa, including self links
+                TaxonClosure.objects.filter(descendant_id__in=saved_ids.values()).delete()
+                TaxonClosure.objects.bulk_create(
+                    [
+                        TaxonClosure(
+                            ancestor_id=saved_ids[ancestor_id],
+                            descendant_id=taxon_id,
+                            depth=depth,
+                        )
+                        for key, taxon_id in saved_ids.items()
+                        for depth, ancestor_id in enumerate(
+                            [key, *ancestor_ids_by_id[key]]
+                        )
+                        if ancestor_id in saved_ids
+                    ],
+                    batch_size=5000,
+                )
+
+                refresh_descendant_counts()
+
+                DataVersion.objects.bump(Taxon._meta.db_table)
         except Exception as e:
             raise CommandError(
                 "Failed to write to database. Import aborted. Error was: %s" % e
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0004_orphaneddescription"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="taxon",
+            index=models.Index(
+                fields=["scientific_name", "id"], name="taxon_scientific_name_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:49
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0005_taxon_taxon_scientific_name_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="taxon",
+            index=models.Index(fields=["rank"], name="taxon_rank_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="taxon",
+            index=models.Index(
+                django.db.models.functions.text.Upper("rank"), name="taxon_rank_upper_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taxon",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["classification"],
+                name="taxon_classification_gin_idx",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+    ]
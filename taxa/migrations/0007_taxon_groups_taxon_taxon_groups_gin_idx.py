@@ -0,0 +1,47 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:50
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def populate_groups(apps, schema_editor):
+    """Store groups of organisms for already imported taxa"""
+    from taxa.models import get_groups_of_organisms
+
+    Taxon = apps.get_model("taxa", "Taxon")
+
+    taxa = list(Taxon.objects.only("scientific_name", "classification"))
+    for taxon in taxa:
+        taxon.groups = get_groups_of_organisms(
+            taxon.scientific_name, taxon.classification
+        )
+    Taxon.objects.bulk_update(taxa, ["groups"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0006_taxon_taxon_rank_idx_taxon_taxon_rank_upper_idx_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taxon",
+            name="groups",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=64),
+                blank=True,
+                default=list,
+                editable=False,
+                help_text="Groups of organisms that the taxon belongs to",
+                size=None,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taxon",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["groups"], name="taxon_groups_gin_idx"
+            ),
+        ),
+        migrations.RunPython(populate_groups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0007_taxon_groups_taxon_taxon_groups_gin_idx"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="taxon",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["scientific_name"],
+                opclasses=["gin_trgm_ops"],
+                name="taxon_scientific_name_trgm_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="synonym",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["synonym_name"],
+                opclasses=["gin_trgm_ops"],
+                name="taxon_synonym_name_trgm_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_closure(apps, schema_editor):
+    """Build the hierarchy of already imported taxa from their classification"""
+    Taxon = apps.get_model("taxa", "Taxon")
+    TaxonClosure = apps.get_model("taxa", "TaxonClosure")
+
+    id_by_slug = dict(Taxon.objects.values_list("slug", "id"))
+
+    links = []
+    for taxon_id, classification in Taxon.objects.values_list("id", "classification"):
+        links.append(TaxonClosure(ancestor_id=taxon_id, descendant_id=taxon_id, depth=0))
+        for depth, parent in enumerate(reversed(classification), start=1):
+            parent_id = id_by_slug.get(parent.get("slug"))
+            if parent_id is not None:
+                links.append(
+                    TaxonClosure(
+                        ancestor_id=parent_id, descendant_id=taxon_id, depth=depth
+                    )
+                )
+
+    TaxonClosure.objects.bulk_create(links, batch_size=5000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0008_taxon_synonym_trgm_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaxonClosure",
+            fields=[
+                ("id", models.BigAutoField(primary_key=True, serialize=False)),
+                ("depth", models.PositiveSmallIntegerField()),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="descendant_links",
+                        to="taxa.taxon",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ancestor_links",
+                        to="taxa.taxon",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "taxon_closure",
+                "indexes": [
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="taxon_closure_descendant_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("ancestor", "descendant"),
+                        name="taxon_closure_ancestor_descendant_uniq",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(populate_closure, migrations.RunPython.noop),
+    ]
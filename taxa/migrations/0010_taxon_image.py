@@ -0,0 +1,22 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0009_taxonclosure"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taxon",
+            name="image",
+            field=models.JSONField(
+                blank=True,
+                editable=False,
+                help_text="Renditions of the primary image, maintained by the media app",
+                null=True,
+            ),
+        ),
+    ]
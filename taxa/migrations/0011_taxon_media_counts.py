@@ -0,0 +1,34 @@
+# Generated by Django 5.2.13 on 2026-10-18 02:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0010_taxon_image"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taxon",
+            name="image_labeling_media_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of media used for image labeling",
+            ),
+        ),
+        migrations.AddField(
+            model_name="taxon",
+            name="media_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of media not used for image labeling",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taxon",
+            index=models.Index(fields=["media_count"], name="taxon_media_count_idx"),
+        ),
+    ]
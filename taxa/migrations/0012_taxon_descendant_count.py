@@ -0,0 +1,40 @@
+# Generated by Django 5.2.13 on 2026-10-18 03:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_descendant_counts(apps, schema_editor):
+    """Count the descendants of already imported taxa"""
+    Taxon = apps.get_model("taxa", "Taxon")
+    TaxonClosure = apps.get_model("taxa", "TaxonClosure")
+
+    descendant_count = (
+        TaxonClosure.objects.filter(ancestor=OuterRef("pk"), depth__gt=0)
+        .order_by()
+        .values("ancestor")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+
+    Taxon.objects.update(descendant_count=Coalesce(Subquery(descendant_count), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("taxa", "0011_taxon_media_counts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="taxon",
+            name="descendant_count",
+            field=models.PositiveIntegerField(
+                default=0,
+                editable=False,
+                help_text="Number of taxa below the taxon in the hierarchy",
+            ),
+        ),
+        migrations.RunPython(populate_descendant_counts, migrations.RunPython.noop),
+    ]
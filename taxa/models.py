@@ -1,3 +1,4 @@
+import json
 import operator
 import os
 from functools import reduce
@@ -5,9 +6,13 @@ from typing import ClassVar
 
 import yaml
 from django.conf import settings
-from django.db import models
-from django.db.models import Q
-from django.db.models.functions import JSONObject, NullIf
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest, JSONObject, NullIf, Upper
 
 
 def get_filter_config():
@@ -29,6 +34,160 @@ class TaxonQuerySet(models.QuerySet):
     def with_name_like(self, name_pattern):
         return self.filter(scientific_name__icontains=name_pattern)
 
+    def search(self, query):
+        """
+        Return taxa with a scientific name or synonym name similar to query,
+        annotated with search_rank and ordered by it. Matching uses trigram
+        word similarity, which works for prefixes and tolerates typos.
+        """
+        matching_ids = (
+            Taxon.objects.filter(scientific_name__trigram_word_similar=query)
+            .order_by()
+            .values("pk")
+            .union(
+                Synonym.objects.filter(synonym_name__trigram_word_similar=query)
+                .order_by()
+                .values("taxon_id")
+            )
+        )
+
+        synonym_similarity = (
+            Synonym.objects.filter(taxon=OuterRef("pk"))
+            .annotate(similarity=TrigramWordSimilarity(query, "synonym_name"))
+            .order_by("-similarity")
+            .values("similarity")[:1]
+        )
+
+        return (
+            self.filter(pk__in=matching_ids)
+            .annotate(
+                search_rank=Greatest(
+                    TrigramWordSimilarity(query, "scientific_name"),
+                    Coalesce(Subquery(synonym_similarity), Value(0.0)),
+                )
+            )
+            .order_by("-search_rank", "scientific_name")
+        )
+
+    def facet_counts(self):
+        """
+        Return the number of taxa for each value of the filters offered in the
+        REST API, as {"group": {...}, "rank": {...}, "culture-collection": {...},
+        "harmful-only": count, "helcom-eg-phyto-only": count}. Groups are
+        counted like within_group does, i.e. for species or below only, and
+        "all" is the number of species or below. All counts are computed in
+        one query using grouping sets.
+        """
+        group_counts = {"all": 0} | {
+            group["group_name"]: 0 for group in self.filter_config["groups_of_organisms"]
+        }
+
+        counts = {
+            "group": group_counts,
+            "rank": {},
+            "culture-collection": {},
+            "harmful-only": 0,
+            "helcom-eg-phyto-only": 0,
+        }
+
+        queryset = self.order_by().values(
+            taxon_id=F("id"),
+            taxon_rank=F("rank"),
+            taxon_groups=F("groups"),
+            facts_data=F("facts__data"),
+        )
+
+        try:
+            subquery_sql, subquery_params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return counts
+
+        # the order of the grouping sets, and of the columns selected for them
+        facets = (
+            "rank",
+            "group",
+            "culture-collection",
+            "all",
+            "harmful-only",
+            "helcom-eg-phyto-only",
+        )
+
+        sql = (
+            """
+            SELECT
+                GROUPING(
+                    taxa.taxon_rank, group_names.name, providers.name,
+                    taxa.is_species, taxa.is_harmful, taxa.is_helcom_eg_phyto
+                ),
+                taxa.taxon_rank, group_names.name, providers.name,
+                taxa.is_species, taxa.is_harmful, taxa.is_helcom_eg_phyto,
+                COUNT(DISTINCT taxa.taxon_id)
+            FROM (
+                SELECT
+                    taxon_id,
+                    taxon_rank,
+                    taxon_groups,
+                    facts_data,
+                    taxon_rank = ANY(%%s) AS is_species,
+                    COALESCE(facts_data @> %%s::jsonb, false) AS is_harmful,
+                    COALESCE(facts_data @> %%s::jsonb, false) AS is_helcom_eg_phyto
+                FROM (%s) filtered_taxa
+            ) taxa
+            LEFT JOIN LATERAL unnest(
+                CASE WHEN taxa.is_species THEN taxa.taxon_groups END
+            ) AS group_names(name) ON true
+            LEFT JOIN LATERAL (
+                SELECT DISTINCT fact ->> 'provider'
+                FROM jsonb_array_elements(
+                    CASE WHEN jsonb_typeof(taxa.facts_data) = 'array'
+                    THEN taxa.facts_data END
+                ) fact
+                WHERE fact ->> 'collection' = 'Culture collection'
+            ) AS providers(name) ON true
+            GROUP BY GROUPING SETS (
+                (taxa.taxon_rank), (group_names.name), (providers.name),
+                (taxa.is_species), (taxa.is_harmful), (taxa.is_helcom_eg_phyto)
+            )
+        """
+            % subquery_sql
+        )
+
+        params = (
+            list(self.filter_config["species_or_below"]),
+            json.dumps([{"collection": "Harmful algae blooms"}]),
+            json.dumps([{"attributes": {"provider": "PEG_BVOL"}}]),
+            *subquery_params,
+        )
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        all_grouped = (1 << len(facets)) - 1
+
+        for grouping, *values, count in rows:
+            # GROUPING() has a zero bit for the column grouped by in this set
+            position = next(
+                index
+                for index in range(len(facets))
+                if all_grouped ^ grouping == 1 << (len(facets) - 1 - index)
+            )
+            facet, value = facets[position], values[position]
+
+            if value is None or value is False:
+                continue
+
+            if facet in ("rank", "culture-collection"):
+                counts[facet][value] = count
+            elif facet == "group":
+                group_counts[value] = count
+            elif facet == "all":
+                group_counts["all"] = count
+            else:
+                counts[facet] = count
+
+        return counts
+
     def within_rank(self, rank):
         return self.filter(rank__iexact=rank)
 
@@ -67,26 +226,39 @@ class TaxonQuerySet(models.QuerySet):
         if group_name == "all":
             return self.species_only()
 
-        included_taxa_by_group = {
-            group["group_name"].lower(): group["included_taxa"]
+        group_names = {
+            group["group_name"].lower(): group["group_name"]
             for group in self.filter_config["groups_of_organisms"]
         }
 
-        if group_name not in included_taxa_by_group:
-            valid_groups = included_taxa_by_group.keys()
+        if group_name not in group_names:
+            valid_groups = group_names.keys()
             raise TaxonQuerySet.InvalidQuery(
                 "The provided value for group is not valid. Please "
                 "try one of the following: %s." % ", ".join(valid_groups)
             )
 
-        parents = included_taxa_by_group[group_name]
+        group_name = group_names[group_name]
+
+        return self.species_only().filter(groups__contains=[group_name])
 
-        filters = [
-            Q(classification__contains=[{"scientific_name": parent}])
-            for parent in parents
-        ]
 
-        return self.species_only().filter(reduce(operator.or_, filters))
+def get_groups_of_organisms(scientific_name, classification):
+    """
+    Return the names of the groups of organisms (see filters.yaml) that a
+    taxon belongs to, based on its own name and the names in its classification.
+    """
+    names = {scientific_name} | {
+        parent.get("scientific_name")
+        for parent in classification
+        if isinstance(parent, dict)
+    }
+
+    return [
+        group["group_name"]
+        for group in TaxonQuerySet.filter_config["groups_of_organisms"]
+        if names & set(group["included_taxa"])
+    ]
 
 
 # For annotations
@@ -119,6 +291,34 @@ class Taxon(models.Model):
     parent = models.JSONField(default=dict)
     classification = models.JSONField(default=list)
     children = models.JSONField(default=list)
+    groups = ArrayField(
+        models.CharField(max_length=64),
+        blank=True,
+        default=list,
+        editable=False,
+        help_text="Groups of organisms that the taxon belongs to",
+    )
+    image = models.JSONField(
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="Renditions of the primary image, maintained by the media app",
+    )
+    descendant_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of taxa below the taxon in the hierarchy",
+    )
+    media_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of media not used for image labeling",
+    )
+    image_labeling_media_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of media used for image labeling",
+    )
     image_labeling_description = models.TextField(
         blank=True,
         default="",
@@ -131,6 +331,29 @@ class Taxon(models.Model):
     class Meta:
         db_table = "taxon"
         ordering = ("scientific_name",)
+        indexes: ClassVar = [
+            models.Index(
+                fields=["scientific_name", "id"],
+                name="taxon_scientific_name_id_idx",
+            ),
+            # for rank and group filters
+            models.Index(fields=["rank"], name="taxon_rank_idx"),
+            models.Index(Upper("rank"), name="taxon_rank_upper_idx"),
+            GinIndex(
+                fields=["classification"],
+                opclasses=["jsonb_path_ops"],
+                name="taxon_classification_gin_idx",
+            ),
+            GinIndex(fields=["groups"], name="taxon_groups_gin_idx"),
+            # for illustrated and not illustrated filters
+            models.Index(fields=["media_count"], name="taxon_media_count_idx"),
+            # for search, requires pg_trgm
+            GinIndex(
+                fields=["scientific_name"],
+                opclasses=["gin_trgm_ops"],
+                name="taxon_scientific_name_trgm_idx",
+            ),
+        ]
         permissions: ClassVar = [
             (
                 "edit_image_labeling_description",
@@ -152,6 +375,62 @@ class ImageLabelingTaxonDescription(Taxon):
         default_permissions = ()
 
 
+class TaxonClosure(models.Model):
+    """
+    Every ancestor-descendant pair in the taxonomic hierarchy, including each
+    taxon paired with itself at depth 0. Rebuilt by importtaxa.
+
+    The unique constraint indexes descendants by ancestor, and the index on
+    descendant and depth covers ancestors by descendant.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    ancestor = models.ForeignKey(
+        Taxon,
+        on_delete=models.CASCADE,
+        related_name="descendant_links",
+        db_index=False,
+    )
+    descendant = models.ForeignKey(
+        Taxon,
+        on_delete=models.CASCADE,
+        related_name="ancestor_links",
+        db_index=False,
+    )
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        db_table = "taxon_closure"
+        constraints: ClassVar = [
+            models.UniqueConstraint(
+                fields=["ancestor", "descendant"],
+                name="taxon_closure_ancestor_descendant_uniq",
+            ),
+        ]
+        indexes: ClassVar = [
+            models.Index(
+                fields=["descendant", "depth"],
+                name="taxon_closure_descendant_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return "%s -> %s" % (self.ancestor_id, self.descendant_id)
+
+
+def refresh_descendant_counts():
+    """Store the number of descendants of every taxon, from the closure table."""
+    descendant_count = (
+        TaxonClosure.objects.filter(ancestor=OuterRef("pk"), depth__gt=0)
+        .order_by()
+        .values("ancestor")
+        .annotate(count=Count("*"))
+        .values("count")
+    )
+
+    Taxon.objects.update(descendant_count=Coalesce(Subquery(descendant_count), 0))
+
+
 class Synonym(models.Model):
     id = models.BigAutoField(
         primary_key=True,
@@ -171,6 +450,14 @@ class Synonym(models.Model):
     class Meta:
         db_table = "taxon_synonym"
         ordering = ("synonym_name",)
+        indexes: ClassVar = [
+            # for search, requires pg_trgm
+            GinIndex(
+                fields=["synonym_name"],
+                opclasses=["gin_trgm_ops"],
+                name="taxon_synonym_name_trgm_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.synonym_name
@@ -1 +1,526 @@
-# Create your tests here.
+import gzip
+import json
+import os
+
+import pytest
+from django.urls import reverse
+
+from facts.models import Facts
+from nordicmicroalgae.cache import BoundedLocMemCache
+from nordicmicroalgae.middleware import CompressionMiddleware
+from synchronization.models import DATASET_GENERATION, DataVersion
+from taxa.models import (
+    Synonym,
+    Taxon,
+    TaxonClosure,
+    get_groups_of_organisms,
+    refresh_descendant_counts,
+)
+from taxa.views import SynonymCollectionView, TaxonCollectionView
+
+IN_GITHUB_ACTIONS = os.getenv("GITHUB_ACTIONS") == "true"
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_with_cursor(client):
+    # Given taxa where two share the same scientific name
+    Taxon.objects.create(id=1, slug="taxon-c", scientific_name="C")
+    Taxon.objects.create(id=2, slug="taxon-a", scientific_name="A")
+    Taxon.objects.create(id=3, slug="taxon-b-1", scientific_name="B")
+    Taxon.objects.create(id=4, slug="taxon-b-2", scientific_name="B")
+
+    # When walking the collection two taxa at a time
+    url = reverse("taxon-collection")
+    retrieved_slugs = []
+    cursor = ""
+    while cursor is not None:
+        response = client.get(url, {"cursor": cursor, "limit": 2, "fields": "slug"})
+        assert response.status_code == 200
+        assert response["X-Total"] == "4"
+
+        for taxon in response.json()["taxa"]:
+            # fields used only for the cursor are left out
+            assert set(taxon) == {"slug"}
+            retrieved_slugs.append(taxon["slug"])
+
+        cursor = response.headers.get("X-Next-Cursor")
+
+    # Then all taxa are returned once, in scientific name order
+    assert retrieved_slugs == ["taxon-a", "taxon-b-1", "taxon-b-2", "taxon-c"]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_with_invalid_cursor(client):
+    # When fetching taxa with a malformed cursor
+    url = reverse("taxon-collection")
+    response = client.get(url, {"cursor": "not-a-cursor"})
+
+    # Then the request is rejected
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_total(client):
+    # Given some taxa
+    for number in range(5):
+        Taxon.objects.create(id=number, slug="taxon-%d" % number)
+
+    url = reverse("taxon-collection")
+
+    # When fetching a page of taxa
+    response = client.get(url, {"offset": 1, "limit": 2})
+
+    # Then the exact total is returned for the whole collection
+    assert len(response.json()["taxa"]) == 2
+    assert response["X-Total"] == "5"
+
+    # When fetching a page past the end
+    response = client.get(url, {"offset": 10, "limit": 2})
+
+    # Then the exact total is still returned
+    assert response.json()["taxa"] == []
+    assert response["X-Total"] == "5"
+
+    # When asking for an estimated total
+    response = client.get(url, {"total": "estimate"})
+
+    # Then only the estimate is returned
+    assert "X-Total" not in response
+    assert int(response["X-Total-Estimate"]) >= 0
+
+    # When asking for no total
+    response = client.get(url, {"total": "none"})
+
+    # Then no total is returned
+    assert "X-Total" not in response
+    assert "X-Total-Estimate" not in response
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_count_taxa(client, django_assert_num_queries):
+    # Given some taxa, one of them a species
+    for number in range(5):
+        Taxon.objects.create(id=number, slug="taxon-%d" % number)
+    Taxon.objects.filter(id=0).update(rank="Species")
+
+    url = reverse("taxon-collection")
+
+    # When counting the species
+    with django_assert_num_queries(2):
+        response = client.head(url, {"rank": "Species", "fields": "slug"})
+
+    # Then they are counted
+    assert response["X-Total"] == "1"
+
+    # When counting them again, selecting other fields
+    with django_assert_num_queries(1):
+        response = client.head(url, {"rank": "Species", "fields": "rank"})
+
+    # Then the count is served from the cache
+    assert response["X-Total"] == "1"
+
+    # When the taxa have been changed
+    Taxon.objects.filter(id=1).update(rank="Species")
+    DataVersion.objects.bump("taxon")
+
+    # Then they are counted again
+    response = client.head(url, {"rank": "Species"})
+    assert response["X-Total"] == "2"
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_stream_taxa(client):
+    # Given some taxa
+    for number in range(5):
+        Taxon.objects.create(
+            id=number, slug="taxon-%d" % number, scientific_name="T%d" % number
+        )
+
+    # When streaming taxa
+    url = reverse("taxon-collection")
+    response = client.get(url, {"stream": "true", "offset": 1, "fields": "slug"})
+
+    # Then the taxa are returned as a regular collection document
+    assert response.streaming
+    assert response["X-Total"] == "5"
+    assert json.loads(b"".join(response.streaming_content)) == {
+        "taxa": [{"slug": "taxon-%d" % number} for number in range(1, 5)]
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxon_conditionally(client):
+    # Given a taxon
+    Taxon.objects.create(id=1, slug="taxon")
+
+    # When fetching the taxon
+    url = reverse("taxon", kwargs={"slug": "taxon"})
+    response = client.get(url)
+    assert response.status_code == 200
+
+    # Then fetching it again with the returned ETag is answered as not modified
+    response = client.get(url, headers={"If-None-Match": response["ETag"]})
+    assert response.status_code == 304
+
+    # When the taxa have been changed
+    DataVersion.objects.bump("taxon")
+
+    # Then the taxon is sent again
+    response = client.get(url, headers={"If-None-Match": response["ETag"]})
+    assert response.status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_cached_taxa(client, django_assert_num_queries):
+    # Given a taxon
+    Taxon.objects.create(id=1, slug="taxon")
+
+    # When fetching the taxa twice, with parameters in different order
+    url = reverse("taxon-collection")
+    response = client.get(url + "?fields=slug&rank=Species")
+    assert response.status_code == 200
+
+    # Then the second response is served from the cache
+    with django_assert_num_queries(1):
+        cached_response = client.get(url + "?rank=Species&fields=slug")
+    assert cached_response.content == response.content
+
+    # When a new dataset has been synchronized
+    DataVersion.objects.bump(DATASET_GENERATION)
+
+    # Then the response is built again
+    with django_assert_num_queries(2):
+        client.get(url + "?rank=Species&fields=slug")
+
+
+def test_cache_bounded_by_size():
+    # Given a cache with room for about three values of 1000 bytes
+    cache = BoundedLocMemCache("test-bounded", {"OPTIONS": {"MAX_SIZE": 3500}})
+    cache.clear()
+    for key in ("first", "second", "third"):
+        cache.set(key, b"x" * 1000)
+
+    # When the first value is used and a fourth value is stored
+    assert cache.get("first") is not None
+    cache.set("fourth", b"x" * 1000)
+
+    # Then the least recently used value is evicted
+    assert cache.get("second") is None
+    assert all(cache.get(key) for key in ("first", "third", "fourth"))
+
+    # When storing a value larger than the whole cache
+    cache.set("large", b"x" * 4000)
+
+    # Then it is not stored, and nothing is evicted for it
+    assert cache.get("large") is None
+    assert all(cache.get(key) for key in ("first", "third", "fourth"))
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_compressed_taxa(client, monkeypatch):
+    # Given some taxa
+    for number in range(1, 21):
+        Taxon.objects.create(id=number, slug="taxon-%d" % number)
+
+    compress = CompressionMiddleware.compress
+    compressed_contents = []
+
+    def compress_and_count(self, content, encoding, cached=False):
+        compressed_contents.append(content)
+        return compress(self, content, encoding, cached)
+
+    monkeypatch.setattr(CompressionMiddleware, "compress", compress_and_count)
+
+    # When fetching the taxa without and with gzip accepted
+    url = reverse("taxon-collection")
+    response = client.get(url)
+    compressed_response = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    # Then the second response is the first one compressed
+    assert "Content-Encoding" not in response
+    assert compressed_response["Content-Encoding"] == "gzip"
+    assert compressed_response["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(compressed_response.content) == response.content
+    assert compressed_response["ETag"] == "W/" + response["ETag"]
+
+    # When fetching the taxa compressed again
+    cached_response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+
+    # Then the compressed content is served from the cache
+    assert cached_response.content == compressed_response.content
+    assert len(compressed_contents) == 1
+
+    # Then the weak ETag can be used for conditional requests
+    response = client.get(
+        url,
+        headers={"Accept-Encoding": "gzip", "If-None-Match": cached_response["ETag"]},
+    )
+    assert response.status_code == 304
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_within_group(client):
+    # Given a ciliate and a cyanobacterium with groups computed from their classification
+    for taxon_id, slug, parent in (
+        (1, "ciliate", "Ciliophora"),
+        (2, "cyano", "Cyanobacteria"),
+    ):
+        classification = [{"scientific_name": parent}]
+        Taxon.objects.create(
+            id=taxon_id,
+            slug=slug,
+            rank="Species",
+            classification=classification,
+            groups=get_groups_of_organisms(slug, classification),
+        )
+
+    # When fetching taxa within the ciliates group
+    url = reverse("taxon-collection")
+    response = client.get(url, {"group": "ciliates", "fields": "slug,groups"})
+
+    # Then only the ciliate is returned
+    assert response.json()["taxa"] == [{"slug": "ciliate", "groups": ["Ciliates"]}]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxon_facets(client):
+    # Given two harmful diatom species, one in two culture collections,
+    # and a diatom genus
+    for taxon_id, slug, rank, facts in (
+        (1, "species-1", "Species", [{"collection": "Harmful algae blooms"}]),
+        (
+            2,
+            "species-2",
+            "Species",
+            [
+                {"collection": "Harmful algae blooms"},
+                {"collection": "Culture collection", "provider": "NORCCA"},
+                {"collection": "Culture collection", "provider": "SCCAP"},
+            ],
+        ),
+        (
+            3,
+            "genus",
+            "Genus",
+            [{"collection": "Culture collection", "provider": "NORCCA"}],
+        ),
+    ):
+        taxon = Taxon.objects.create(
+            id=taxon_id, slug=slug, rank=rank, groups=["Diatoms"]
+        )
+        Facts.objects.create(taxon=taxon, data=facts)
+
+    # When fetching the facets for all taxa
+    url = reverse("taxon-facets")
+    facets = client.get(url).json()["facets"]
+
+    # Then each filter value is counted, with groups for species only
+    assert facets["group"]["all"] == 2
+    assert facets["group"]["Diatoms"] == 2
+    assert facets["group"]["Ciliates"] == 0
+    assert facets["rank"] == {"Species": 2, "Genus": 1}
+    assert facets["culture-collection"] == {"NORCCA": 2, "SCCAP": 1}
+    assert facets["harmful-only"] == 2
+    assert facets["helcom-eg-phyto-only"] == 0
+
+    # When fetching the facets for taxa in a culture collection
+    facets = client.get(url, {"culture-collection": "NORCCA"}).json()["facets"]
+
+    # Then only those taxa are counted
+    assert facets["rank"] == {"Species": 1, "Genus": 1}
+    assert facets["culture-collection"] == {"NORCCA": 2, "SCCAP": 1}
+    assert facets["harmful-only"] == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_search_taxa(client):
+    # Given taxa where one is found through a synonym
+    Taxon.objects.create(
+        id=1, slug="dinophysis-acuta", scientific_name="Dinophysis acuta"
+    )
+    Taxon.objects.create(
+        id=2, slug="dinophysis-norvegica", scientific_name="Dinophysis norvegica"
+    )
+    Taxon.objects.create(
+        id=3, slug="alexandrium-ostenfeldii", scientific_name="Alexandrium ostenfeldii"
+    )
+    Synonym.objects.create(taxon_id=3, synonym_name="Goniodoma ostenfeldii")
+
+    url = reverse("taxon-search")
+
+    # When searching for a misspelled name
+    response = client.get(url, {"q": "Dinophysis akuta", "fields": "slug"})
+
+    # Then the closest match is ranked first
+    assert response.json()["taxa"][0] == {"slug": "dinophysis-acuta"}
+
+    # When searching for the beginning of a synonym
+    response = client.get(url, {"q": "Goniodom", "fields": "slug"})
+
+    # Then the taxon of the synonym is found
+    assert response.json()["taxa"] == [{"slug": "alexandrium-ostenfeldii"}]
+
+    # When searching without a query
+    response = client.get(url)
+
+    # Then the request is rejected
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxon_hierarchy(client):
+    # Given a genus with a species and a variety of the species
+    genus = Taxon.objects.create(id=1, slug="genus", scientific_name="Genus")
+    species = Taxon.objects.create(id=2, slug="species", scientific_name="Genus species")
+    variety = Taxon.objects.create(
+        id=3, slug="variety", scientific_name="Genus species var"
+    )
+    for depth, ancestor, descendant in (
+        (0, genus, genus),
+        (0, species, species),
+        (0, variety, variety),
+        (1, genus, species),
+        (1, species, variety),
+        (2, genus, variety),
+    ):
+        TaxonClosure.objects.create(ancestor=ancestor, descendant=descendant, depth=depth)
+    refresh_descendant_counts()
+
+    # When fetching the descendants of the genus
+    url = reverse("taxon-descendants", kwargs={"slug": "genus"})
+    response = client.get(url, {"fields": "slug,descendant_count"})
+
+    # Then taxa at all depths below it are returned
+    assert response.json()["taxa"] == [
+        {"slug": "species", "descendant_count": 1},
+        {"slug": "variety", "descendant_count": 0},
+    ]
+
+    # When fetching the ancestors of the variety
+    url = reverse("taxon-ancestors", kwargs={"slug": "variety"})
+    response = client.get(url, {"fields": "slug"})
+
+    # Then they are returned from the top of the classification
+    assert response.json()["taxa"] == [{"slug": "genus"}, {"slug": "species"}]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_in_batch(client):
+    # Given some taxa
+    Taxon.objects.create(id=1, slug="taxon-a", scientific_name="A")
+    Taxon.objects.create(id=2, slug="taxon-b", scientific_name="B")
+
+    url = reverse("taxon-batch")
+
+    # When fetching taxa by slug, including one that doesn't exist
+    response = client.get(url, {"slug": "taxon-b,missing,taxon-a", "fields": "slug"})
+
+    # Then the taxa are returned by slug, with null for the missing one
+    assert response.json() == {
+        "taxa": {
+            "taxon-b": {"slug": "taxon-b"},
+            "missing": None,
+            "taxon-a": {"slug": "taxon-a"},
+        }
+    }
+
+    # When fetching taxa by id
+    response = client.get(url, {"id": "2,3", "fields": "scientific_name"})
+
+    # Then the taxa are returned by id
+    assert response.json() == {"taxa": {"2": {"scientific_name": "B"}, "3": None}}
+
+    # When fetching taxa by an invalid id
+    response = client.get(url, {"id": "not-an-id"})
+
+    # Then the request is rejected
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_as_columns(client):
+    # Given some taxa
+    Taxon.objects.create(id=1, slug="taxon-a", scientific_name="A", rank="Genus")
+    Taxon.objects.create(id=2, slug="taxon-b", scientific_name="B", rank="Species")
+
+    url = reverse("taxon-collection")
+    params = {"fields": "slug,rank", "format": "columns"}
+
+    # When fetching taxa as columns
+    response = client.get(url, params)
+
+    # Then field names are listed once and taxa as lists of values
+    expected = {
+        "columns": ["slug", "rank"],
+        "taxa": [["taxon-a", "Genus"], ["taxon-b", "Species"]],
+    }
+    assert response.json() == expected
+
+    # When streaming taxa as columns
+    response = client.get(url, {**params, "stream": "true"})
+
+    # Then the same document is returned
+    assert json.loads(b"".join(response.streaming_content)) == expected
+
+    # When asking for an unknown format
+    response = client.get(url, {"format": "xml"})
+
+    # Then the request is rejected
+    assert response.status_code == 400
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(IN_GITHUB_ACTIONS, reason="Skipped in github actions")
+def test_fetch_taxa_rendered_in_database(client, monkeypatch):
+    # Given taxa with a synonym
+    Taxon.objects.create(
+        id=1,
+        slug="taxon-a",
+        scientific_name="Ä",
+        classification=[{"slug": "root", "scientific_name": "Root"}],
+    )
+    Taxon.objects.create(id=2, slug="taxon-b", scientific_name="B")
+    Synonym.objects.create(taxon_id=1, synonym_name="Synonym")
+
+    # Given taxa stored in the reverse order of their names
+    for number in range(9, 2, -1):
+        Taxon.objects.create(
+            id=number, slug="taxon-%d" % number, scientific_name="C %d" % number
+        )
+
+    requests = (
+        ("taxon-collection", {"offset": 1, "limit": 1}),
+        ("taxon-collection", {"fields": "slug,classification,descendant_count"}),
+        ("taxon-collection", {"offset": 5, "total": "exact"}),
+        ("synonym-collection", {}),
+    )
+
+    for view_name, params in requests:
+        url = reverse(view_name)
+
+        # When fetching a collection rendered by the database
+        response = client.get(url, params)
+
+        # Then the response is the same as when rendered in Python
+        with monkeypatch.context() as patch:
+            patch.setattr(TaxonCollectionView, "render_in_database", False)
+            patch.setattr(SynonymCollectionView, "render_in_database", False)
+            DataVersion.objects.bump(DATASET_GENERATION)
+            expected_response = client.get(url, params)
+
+        assert response.json() == expected_response.json()
+        assert response["X-Total"] == expected_response["X-Total"]
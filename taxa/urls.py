@@ -2,12 +2,30 @@ from django.urls import path
 
 from taxa.views import (
     SynonymCollectionView,
+    TaxonAncestorCollectionView,
+    TaxonBatchView,
     TaxonCollectionView,
+    TaxonDescendantCollectionView,
+    TaxonFacetView,
+    TaxonSearchView,
     TaxonView,
 )
 
 urlpatterns = [
+    path("taxa/search/", TaxonSearchView.as_view(), name="taxon-search"),
+    path("taxa/batch/", TaxonBatchView.as_view(), name="taxon-batch"),
+    path("taxa/facets/", TaxonFacetView.as_view(), name="taxon-facets"),
     path("taxa/<str:slug>/", TaxonView.as_view(), name="taxon"),
+    path(
+        "taxa/<str:slug>/descendants/",
+        TaxonDescendantCollectionView.as_view(),
+        name="taxon-descendants",
+    ),
+    path(
+        "taxa/<str:slug>/ancestors/",
+        TaxonAncestorCollectionView.as_view(),
+        name="taxon-ancestors",
+    ),
     path("taxa/", TaxonCollectionView.as_view(), name="taxon-collection"),
     path("synonyms/", SynonymCollectionView.as_view(), name="synonym-collection"),
 ]
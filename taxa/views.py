@@ -1,13 +1,14 @@
-from django.db.models import Count, OuterRef, Q, Subquery
-
-from core.views.generics import ClientError, CollectionView, ResourceView
-from media.models import Image
+from core.views.encoding import JSONResponse
+from core.views.generics import (
+    ClientError,
+    CollectionView,
+    ResourceBatchView,
+    ResourceView,
+)
 from taxa.models import RelatedTaxon, Synonym, Taxon
 
 
-class TaxonView(ResourceView):
-    queryset = Taxon.objects
-
+class TaxonFieldsMixin:
     fields = (
         "slug",
         "scientific_name",
@@ -16,47 +17,48 @@ class TaxonView(ResourceView):
         "parent",
         "classification",
         "children",
+        "groups",
+        "descendant_count",
+        "media_count",
+        "image_labeling_media_count",
         "image_labeling_description",
     )
 
 
-class TaxonCollectionView(CollectionView):
+class TaxonView(TaxonFieldsMixin, ResourceView):
     queryset = Taxon.objects
 
-    fields = (
-        "slug",
-        "scientific_name",
-        "authority",
-        "rank",
-        "parent",
-        "classification",
-        "children",
-        "image",
-        "image_labeling_description",
-    )
+    data_versions = ("taxon", "taxon_media")
+
+    response_cache = "api"
+
+
+class TaxonBatchView(TaxonFieldsMixin, ResourceBatchView):
+    queryset = Taxon.objects
 
     plural_key = "taxa"
 
-    def get_fields(self, *args, **kwargs):
-        fields, expressions = super().get_fields(*args, **kwargs)
+    lookup_fields = ("slug", "id")
 
-        if "image" in fields:
-            # prefer non-ImageLabeling images for taxon thumbnails
-            subqueryset = (
-                Image.objects.filter(taxon=OuterRef("pk"))
-                .filter(
-                    Q(attributes__imagelabeling__isnull=True)
-                    | Q(attributes__imagelabeling=False)
-                )
-                .order_by("priority")
-            )
-            expressions.update(
-                {
-                    "image": Subquery(subqueryset.values("renditions")[:1]),
-                }
-            )
+    data_versions = ("taxon", "taxon_media")
 
-        return fields, expressions
+    response_cache = "api"
+
+
+class TaxonCollectionView(TaxonFieldsMixin, CollectionView):
+    queryset = Taxon.objects
+
+    fields = (*TaxonFieldsMixin.fields, "image")
+
+    plural_key = "taxa"
+
+    cursor_fields = ("scientific_name", "id")
+
+    render_in_database = True
+
+    data_versions = ("taxon", "taxon_facts", "taxon_media")
+
+    response_cache = "api"
 
     def get_queryset(self, *args, **kwargs):
         queryset = super().get_queryset(*args, **kwargs)
@@ -102,25 +104,68 @@ class TaxonCollectionView(CollectionView):
                 "It is not possible to combine illustrated-only and not-illustrated-only."
             )
 
-        if illustrated_only or not_illustrated_only:
-            # Count only images that are NOT marked for ImageLabeling
-            queryset = queryset.annotate(
-                image_count=Count(
-                    "media",
-                    filter=Q(media__attributes__imagelabeling__isnull=True)
-                    | Q(media__attributes__imagelabeling=False),
-                )
-            )
-            if illustrated_only:
-                queryset = queryset.filter(image_count__gt=0)
-            elif not_illustrated_only:
-                queryset = queryset.filter(image_count=0)
+        # media_count leaves out media marked for ImageLabeling
+        if illustrated_only:
+            queryset = queryset.filter(media_count__gt=0)
+        elif not_illustrated_only:
+            queryset = queryset.filter(media_count=0)
 
         queryset = queryset.order_by("scientific_name")
 
         return queryset
 
 
+class TaxonDescendantCollectionView(TaxonCollectionView):
+    def get_queryset(self, *args, **kwargs):
+        queryset = super().get_queryset(*args, **kwargs)
+
+        return queryset.filter(
+            ancestor_links__ancestor__slug=self.kwargs["slug"],
+            ancestor_links__depth__gt=0,
+        )
+
+
+class TaxonAncestorCollectionView(TaxonCollectionView):
+    cursor_fields = None
+
+    def get_queryset(self, *args, **kwargs):
+        queryset = super().get_queryset(*args, **kwargs)
+
+        # from the root of the classification down to the parent
+        return queryset.filter(
+            descendant_links__descendant__slug=self.kwargs["slug"],
+            descendant_links__depth__gt=0,
+        ).order_by("-descendant_links__depth")
+
+
+class TaxonSearchView(TaxonCollectionView):
+    cursor_fields = None
+
+    def get_queryset(self, *args, **kwargs):
+        query = self.request.GET.get("q", "").strip()
+
+        if not query:
+            raise ClientError("The q parameter is required for searching taxa.")
+
+        queryset = super().get_queryset(*args, **kwargs)
+
+        return queryset.search(query)
+
+
+class TaxonFacetView(TaxonCollectionView):
+    """Counts of taxa per filter value, for the taxa matching the filters."""
+
+    http_method_names = ("get", "options")
+
+    def get(self, request, *args, **kwargs):
+        try:
+            facets = self.get_queryset().facet_counts()
+        except ClientError as exc:
+            return JSONResponse({"message": str(exc)}, status=400)
+
+        return JSONResponse({"facets": facets})
+
+
 class SynonymCollectionView(CollectionView):
     queryset = Synonym.objects
 
@@ -132,6 +177,12 @@ class SynonymCollectionView(CollectionView):
 
     plural_key = "synonyms"
 
+    render_in_database = True
+
+    data_versions = ("taxon", "taxon_synonym")
+
+    response_cache = "api"
+
     def get_fields(self, *args, **kwargs):
         fields, expressions = super().get_fields(*args, **kwargs)
 